@@ -1,5 +1,5 @@
 from DataBase import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 
 class Users(Base):
     __tablename__ = "users"
@@ -22,3 +22,9 @@ class Todos(Base):
     priority = Column(Boolean, default=False)
     complete = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
+
+    # Per-user lookups and listings filter on owner_id first; see the matching Alembic migration
+    __table_args__ = (
+        Index("ix_todos_owner_id_id", "owner_id", "id"),
+        Index("ix_todos_owner_id_complete_priority", "owner_id", "complete", "priority"),
+    )
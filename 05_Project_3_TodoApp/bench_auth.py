@@ -0,0 +1,78 @@
+# Per-request auth overhead of get_current_user with and without the verified-token cache
+# Usage: python bench_auth.py --requests 5000
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from DataBase import Base, get_db
+from Models import Todos
+from mainapi import app
+from routers.Auth import create_access_token, get_current_user
+from token_cache import token_cache
+
+
+async def time_dependency(token: str, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await get_current_user(token)
+    return (time.perf_counter() - start) / requests
+
+
+def time_route(client: TestClient, token: str, requests: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/todo/1", headers=headers)
+    return (time.perf_counter() - start) / requests
+
+
+# Serve /todo routes from an in-memory SQLite database with a single todo
+def in_memory_client() -> TestClient:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessions() as db:
+            db.add(Todos(id=1, title="bench", description="bench", priority=False, owner_id=1))
+            await db.commit()
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    asyncio.run(setup())
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auth overhead with and without the token cache")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    token = create_access_token("bench", "user", 1, timedelta(minutes=20))
+    cache_size = token_cache.max_size
+
+    results = {}
+    for label, size in (("no cache", 0), ("cache", cache_size)):
+        token_cache.max_size = size
+        token_cache.clear()
+        results[label] = asyncio.run(time_dependency(token, args.requests))
+    print(f"get_current_user: {results['no cache'] * 1e6:.1f} us -> {results['cache'] * 1e6:.1f} us per request "
+          f"({results['no cache'] / results['cache']:.1f}x)")
+
+    client = in_memory_client()
+    for label, size in (("no cache", 0), ("cache", cache_size)):
+        token_cache.max_size = size
+        token_cache.clear()
+        results[label] = time_route(client, token, args.requests // 5)
+    saved = (results["no cache"] - results["cache"]) * 1e6
+    print(f"GET /todo/{{id}}: {results['no cache'] * 1e3:.2f} ms -> {results['cache'] * 1e3:.2f} ms per request "
+          f"(auth saves {saved:.0f} us)")
@@ -0,0 +1,81 @@
+# CPU cost per 1,000 listed todos: fetching and serializing a page the old way (ORM entities
+# walked by jsonable_encoder) against the current read path (projected rows + TodoPage).
+# Usage: python bench_serialization.py --rows 1000 --runs 50
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from DataBase import Base
+from Models import Todos
+from queries import all_todos
+from routers.todos import TodoPage
+
+page_adapter = TypeAdapter(TodoPage)
+
+
+# What FastAPI does without a response model: encode to plain Python, then json.dumps
+def serialize_entities(todos: list) -> bytes:
+    return json.dumps(jsonable_encoder({"items": todos, "next_cursor": None})).encode()
+
+
+# What FastAPI does with response_model=TodoPage: validate, then dump to JSON in pydantic-core
+def serialize_rows(rows: list) -> bytes:
+    return page_adapter.dump_json(page_adapter.validate_python({"items": rows, "next_cursor": None}))
+
+
+async def cpu_ms(function, runs: int) -> float:
+    start = time.process_time()
+    for _ in range(runs):
+        await function()
+    return (time.process_time() - start) / runs * 1000
+
+
+async def main(args):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Todos), [
+            {"id": todo_id, "title": f"todo {todo_id}", "description": "benchmark description",
+             "priority": todo_id % 2 == 0, "complete": False, "owner_id": 1}
+            for todo_id in range(1, args.rows + 1)])
+
+    async with sessions() as db:
+        todos = (await db.scalars(select(Todos))).all()
+        rows = (await db.execute(all_todos())).all()
+    assert json.loads(serialize_entities(todos)) == json.loads(serialize_rows(rows))
+
+    async def fetch_entities():
+        async with sessions() as db:
+            return (await db.scalars(select(Todos))).all()
+
+    async def fetch_rows():
+        async with sessions() as db:
+            return (await db.execute(all_todos())).all()
+
+    async def encode_entities():
+        serialize_entities(todos)
+
+    async def encode_rows():
+        serialize_rows(rows)
+
+    per_1000 = 1000 / args.rows
+    fetch_before, fetch_after = await cpu_ms(fetch_entities, args.runs), await cpu_ms(fetch_rows, args.runs)
+    encode_before, encode_after = await cpu_ms(encode_entities, args.runs), await cpu_ms(encode_rows, args.runs)
+    print(f"fetch:     {fetch_before * per_1000:.2f} ms -> {fetch_after * per_1000:.2f} ms CPU per 1,000 rows")
+    print(f"serialize: {encode_before * per_1000:.2f} ms -> {encode_after * per_1000:.2f} ms CPU per 1,000 rows")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialization CPU of the todo list endpoints")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+#pip install passlib bcrypt
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+# bcrypt cost factor: each +1 doubles the time per hash
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes that run bcrypt, and how many hash/verify calls may be in flight before new ones are refused
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", max(1, (os.cpu_count() or 1) // 2)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", HASH_WORKERS * 4))
+HASH_RETRY_AFTER_SECONDS = 1
+
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# These run inside the worker processes
+def _hash(password: str) -> str:
+    return bcrypt_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return bcrypt_context.verify(password, hashed_password)
+
+
+executor = None
+pending = 0
+
+
+async def _run(function, *args):
+    global executor, pending
+    if pending >= HASH_MAX_PENDING:
+        raise HashingBusy()
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+    finally:
+        pending -= 1
+
+
+# Hash and verify off the event loop; both raise HashingBusy when the pool is saturated
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(_verify, password, hashed_password)
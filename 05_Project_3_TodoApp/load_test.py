@@ -0,0 +1,55 @@
+#pip install httpx
+# Concurrent load test against a running TodoApp: requests/sec and latency percentiles.
+# Run it once against the old synchronous build and once against the async build:
+#   uvicorn mainapi:app --workers 1
+#   python load_test.py --token <jwt> --concurrency 50 --duration 30 --label async
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    latencies, errors = [], []
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[worker(client, args.path, deadline, latencies, errors)
+                               for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    print(f"[{args.label}] {args.path} concurrency={args.concurrency} duration={elapsed:.1f}s")
+    print(f"  requests: {len(latencies)}  errors: {len(errors)}")
+    print(f"  requests/sec: {len(latencies) / elapsed:.1f}")
+    print(f"  p50: {percentile(latencies, 50) * 1000:.1f} ms  p99: {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a TodoApp endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--token", help="Bearer token from POST /auth/token")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--label", default="run")
+    asyncio.run(main(parser.parse_args()))
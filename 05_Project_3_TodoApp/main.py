@@ -1,26 +1,30 @@
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import FastAPI, Depends, HTTPException , Path , status
 import Models
 from Models import Todos
-from DataBase import engine, SessionLocal
+from DataBase import engine, get_db
+from pagination import page_params, paginate_todos
+from queries import all_todos
 from typing import Annotated
 from  pydantic import  BaseModel , Field
 from  routers import  Auth , todos , admin
+from routers.todos import TodoPage
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(Models.Base.metadata.create_all)
+    yield
+    await engine.dispose()
 
-Models.Base.metadata.create_all(bind=engine)
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(Auth.router)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+page_dependency = Annotated[dict, Depends(page_params)]
 
 class TodoRequest(BaseModel):
     title : str = Field(min_length = 3)
@@ -29,13 +33,13 @@ class TodoRequest(BaseModel):
     priority : bool
 
 
-@app.get("/", status_code= status.HTTP_200_OK)
-async def read_all(db: db_dependency):
-    return db.query(Todos).all()
+@app.get("/", status_code= status.HTTP_200_OK, response_model=TodoPage)
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate_todos(db, all_todos(), page)
 
 @app.get("/todo/{todo_id}" , status_code= status.HTTP_200_OK)
 async def read_todo(db: db_dependency, todo_id: int = Path(gt = 0)):
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).first()
+    todo_model = await db.scalar(select(Todos).filter(Todos.id == todo_id))
     if todo_model is not None:
         return todo_model
     raise HTTPException(status_code=404, detail="Todo not Found")
@@ -45,11 +49,11 @@ async  def create_todo(db : db_dependency , todo_request : TodoRequest):
     todo_model = Todos(**todo_request.dict())
 
     db.add(todo_model)
-    db.commit()
+    await db.commit()
 
 @app.put("/todo/{todo_id}", status_code= status.HTTP_204_NO_CONTENT)
 async  def update_todo(db : db_dependency,todo_request : TodoRequest, todo_id : int = Path(gt = 0)):
-    todo_model =  db.query(Todos).filter(Todos.id == todo_id).first()
+    todo_model = await db.scalar(select(Todos).filter(Todos.id == todo_id))
     if todo_model is None:
         raise  HTTPException(status_code=404, detail="Todo not found")
     todo_model.title = todo_request.title
@@ -57,13 +61,13 @@ async  def update_todo(db : db_dependency,todo_request : TodoRequest, todo_id :
     todo_model.priority = todo_request.priority
 
     db.add(todo_model)
-    db.commit()
+    await db.commit()
 
 @app.delete("/todo/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_todo(db: db_dependency, todo_id : int = Path(gt=0)):
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).first()
+    todo_model = await db.scalar(select(Todos).filter(Todos.id == todo_id))
     if todo_model is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    db.query(Todos).filter(Todos.id == todo_id).delete()
+    await db.execute(delete(Todos).filter(Todos.id == todo_id))
 
-    db.commit()
+    await db.commit()
@@ -1,13 +1,35 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import  Models
-from DataBase import engine, SessionLocal
+from DataBase import engine, pool_metrics
+from todo_cache import todo_cache
 from  routers import  Auth , todos , admin
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(Models.Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
-Models.Base.metadata.create_all(bind=engine)
 app.include_router(Auth.router)
 app.include_router(todos.router)
 app.include_router(admin.router)
+
+
+# Connection pool usage: size, in-use and overflow connections, checkout wait times
+@app.get("/metrics/db")
+async def db_metrics():
+    return pool_metrics()
+
+
+# Todo list cache: backend, hits, misses and how many loads actually reached the database
+@app.get("/metrics/cache")
+async def cache_metrics():
+    return todo_cache.metrics()
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+import os
+from typing import Annotated, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select
+
+from Models import Todos
+
+# Page size used when the client does not ask for one, and the largest page it may ask for
+DEFAULT_PAGE_SIZE = int(os.getenv("TODO_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("TODO_MAX_PAGE_SIZE", "500"))
+
+
+# Cursors are opaque to clients: base64 of the last id they have seen
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(data["id"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_params(
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        complete: Optional[bool] = None,
+        priority: Optional[bool] = None,
+):
+    return {"limit": limit, "cursor": cursor, "complete": complete, "priority": priority}
+
+
+# Keyset pagination on id: every page is an index range scan, however deep the client has paged.
+# The query fetches one extra row to know whether there is a next page.
+def page_query(query: Select, page: dict) -> Select:
+    if page["cursor"] is not None:
+        query = query.filter(Todos.id > decode_cursor(page["cursor"]))
+    if page["complete"] is not None:
+        query = query.filter(Todos.complete == page["complete"])
+    if page["priority"] is not None:
+        query = query.filter(Todos.priority == page["priority"])
+    return query.order_by(Todos.id).limit(page["limit"] + 1)
+
+
+async def paginate_todos(db, query: Select, page: dict) -> dict:
+    limit = page["limit"]
+    result = await db.execute(page_query(query, page))
+    todos = result.all()
+    next_cursor = encode_cursor(todos[limit - 1].id) if len(todos) > limit else None
+    return {"items": todos[:limit], "next_cursor": next_cursor}
@@ -0,0 +1,65 @@
+from sqlalchemy import Delete, Select, Update, bindparam, delete, select, update
+
+from Models import Todos
+
+
+# Statements used by routers/todos.py. They live here so test/test_query_plans.py
+# can EXPLAIN exactly what the routes run.
+
+# Columns of a TodoResponse. Reads select these as plain rows, which skips ORM
+# entity hydration and identity-map bookkeeping on every listed todo.
+TODO_COLUMNS = (Todos.id, Todos.title, Todos.description, Todos.priority, Todos.complete, Todos.owner_id)
+
+
+def all_todos() -> Select:
+    return select(*TODO_COLUMNS)
+
+
+def owner_todos(owner_id: int) -> Select:
+    return select(*TODO_COLUMNS).filter(Todos.owner_id == owner_id)
+
+
+def owner_todo(owner_id: int, todo_id: int) -> Select:
+    return select(*TODO_COLUMNS).filter(Todos.id == todo_id).filter(Todos.owner_id == owner_id)
+
+
+# Writes are a single statement each; RETURNING tells the caller whether a row matched
+def update_owner_todo(owner_id: int, todo_id: int, values: dict) -> Update:
+    return (update(Todos)
+            .where(Todos.id == todo_id, Todos.owner_id == owner_id)
+            .values(**values)
+            .returning(Todos.id)
+            .execution_options(synchronize_session=False))
+
+
+def delete_owner_todo(owner_id: int, todo_id: int) -> Delete:
+    return (delete(Todos)
+            .where(Todos.id == todo_id, Todos.owner_id == owner_id)
+            .returning(Todos.id)
+            .execution_options(synchronize_session=False))
+
+
+# Bulk paths: one statement for the whole list (executemany for the per-row update)
+def existing_todo_ids(todo_ids: list[int]) -> Select:
+    # Ids are global, so a bulk create has to check every owner's todos
+    return select(Todos.id).where(Todos.id.in_(todo_ids))
+
+
+def owned_todo_ids(owner_id: int, todo_ids: list[int]) -> Select:
+    return select(Todos.id).where(Todos.owner_id == owner_id, Todos.id.in_(todo_ids))
+
+
+def bulk_update_owner_todos(owner_id: int) -> Update:
+    table = Todos.__table__
+    return (update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.owner_id == owner_id)
+            .values(title=bindparam("b_title"), description=bindparam("b_description"),
+                    priority=bindparam("b_priority")))
+
+
+def complete_owner_todos(owner_id: int, todo_ids: list[int]) -> Update:
+    return (update(Todos)
+            .where(Todos.owner_id == owner_id, Todos.id.in_(todo_ids))
+            .values(complete=True)
+            .returning(Todos.id)
+            .execution_options(synchronize_session=False))
@@ -2,11 +2,13 @@ from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Annotated
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from DataBase import SessionLocal
+from DataBase import get_db
 from Models import Users
-from passlib.context import CryptContext
+from hashing import HashingBusy, HASH_RETRY_AFTER_SECONDS, hash_password, verify_password
+from token_cache import token_cache
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
 
@@ -18,7 +20,6 @@ router = APIRouter(
     tags=["auth"]
 )
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
@@ -37,22 +38,14 @@ class Token(BaseModel):
     token_type: str
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 
-db_dependency = Annotated[Session, Depends(get_db)]
 
-
-def authenticate_user(username: str, password: str, db):
-    user = db.query(Users).filter(Users.username == username).first()  # Fixed typo 'usernam'
+async def authenticate_user(username: str, password: str, db):
+    user = await db.scalar(select(Users).filter(Users.username == username))  # Fixed typo 'usernam'
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -65,6 +58,16 @@ def create_access_token(username: str, role : str, user_id: int, expires_delta:
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    if token_cache.is_revoked(token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked."
+        )
+    # Tokens verified recently skip the signature check
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")  # Changed to "sub" as per JWT best practices
@@ -75,7 +78,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate user."
             )
-        return {"username": username, "id": user_id , "user_role" :user_role}
+        user = {"username": username, "id": user_id , "user_role" :user_role}
+        token_cache.put(token, user, payload.get("exp"))
+        return user
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,19 +88,33 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
         )
 
 
+# Password hashing pool is saturated: ask the client to back off instead of queueing forever
+def too_many_requests():
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, try again shortly",
+        headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)}
+    )
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_user(db: db_dependency, create_user_request: CreateUserRequest):
+    try:
+        hashed_password = await hash_password(create_user_request.password)
+    except HashingBusy:
+        raise too_many_requests()
+
     create_user_model = Users(
         email=create_user_request.email,
         username=create_user_request.username,
         first_name=create_user_request.first_name,
         last_name=create_user_request.last_name,
         role=create_user_request.role,
-        hashed_password=bcrypt_context.hash(create_user_request.password),
+        hashed_password=hashed_password,
         is_active=True
     )
     db.add(create_user_model)
-    db.commit()
+    await db.commit()
 
 
 @router.post("/token", response_model=Token)
@@ -103,7 +122,10 @@ async def login_for_access_token(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
         db: db_dependency
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password, db)
+    except HashingBusy:
+        raise too_many_requests()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -113,3 +135,10 @@ async def login_for_access_token(
     token = create_access_token(user.username, user.id, user.role , timedelta(minutes=20))
 
     return {"access_token": token, "token_type": "bearer"}
+
+
+# Revoke the bearer token used for this request (e.g. on logout)
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_token(token: Annotated[str, Depends(oauth2_bearer)],
+                       user: Annotated[dict, Depends(get_current_user)]):
+    token_cache.revoke(token, jwt.get_unverified_claims(token).get("exp"))
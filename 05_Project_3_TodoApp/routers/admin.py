@@ -2,10 +2,15 @@ from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Path
 from typing import Annotated
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from Models import Todos, Base  # Ensure Base is imported for metadata
-from DataBase import SessionLocal
+from DataBase import get_db
+from pagination import page_params, paginate_todos
+from queries import all_todos
+from todo_cache import todo_cache
 from .Auth import get_current_user
+from .todos import TodoPage
 
 router = APIRouter(
     prefix="/auth",
@@ -13,23 +18,16 @@ router = APIRouter(
 )
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
+page_dependency = Annotated[dict, Depends(page_params)]
 
 
-@router.get("/todo", status_code=status.HTTP_200_OK)
-async def read_all(user: user_dependency, db: db_dependency):
+@router.get("/todo", status_code=status.HTTP_200_OK, response_model=TodoPage)
+async def read_all(user: user_dependency, db: db_dependency, page: page_dependency):
     if user is None or user.get("user_role") != "admin":
         raise HTTPException(status_code=401, detail="Authentication Failed")
-    return db.query(Todos).all()
+    return await paginate_todos(db, all_todos(), page)
 
 
 @router.delete("/todo/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -37,10 +35,13 @@ async def delete_todo(user: user_dependency, db: db_dependency, todo_id: int = P
     if user is None or user.get("user_role") != "admin":
         raise HTTPException(status_code=401, detail="Authentication Failed")
 
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).first()  # Corrected: Use filter() instead of first()
+    # Return the id as well: todos created through main.py have no owner
+    result = await db.execute(delete(Todos).filter(Todos.id == todo_id).returning(Todos.id, Todos.owner_id))
+    deleted = result.first()
 
-    if todo_model is None:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Todo not found")
 
-    db.delete(todo_model)  # Use db.delete() for the model
-    db.commit()
+    await db.commit()
+    if deleted.owner_id is not None:
+        await todo_cache.invalidate(deleted.owner_id)
@@ -1,27 +1,31 @@
-from http.client import HTTPException
-from typing import Annotated
-
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, status, Path
+import os
+from typing import Annotated, Any, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status, Path
 from Models import Todos, Base  # Ensure Base is imported for metadata
-from DataBase import SessionLocal
+from DataBase import get_db
+from pagination import page_params, paginate_todos
+from queries import (bulk_update_owner_todos, complete_owner_todos, delete_owner_todo, existing_todo_ids,
+                     owned_todo_ids, owner_todo, owner_todos, update_owner_todo)
+from todo_cache import todo_cache
 from .Auth import get_current_user
 
 
 router = APIRouter()
 
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Largest list a single bulk request may carry
+BULK_MAX_ITEMS = int(os.getenv("TODO_BULK_MAX_ITEMS", "10000"))
+NOT_FOUND_ERROR = {"type": "not_found", "msg": "Todo not found"}
+ID_TAKEN_ERROR = {"type": "conflict", "msg": "Todo id already exists"}
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
+page_dependency = Annotated[dict, Depends(page_params)]
 
 
 class TodoRequest(BaseModel):
@@ -31,23 +35,49 @@ class TodoRequest(BaseModel):
     priority: int
 
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def read_all(user: user_dependency, db: db_dependency):
+# Declaring response models lets FastAPI validate the rows and serialize them
+# straight to JSON bytes in pydantic-core, instead of walking ORM objects with jsonable_encoder
+class TodoResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: Optional[str]
+    priority: Optional[bool]
+    complete: Optional[bool]
+    owner_id: Optional[int]
+
+
+class TodoPage(BaseModel):
+    items: list[TodoResponse]
+    next_cursor: Optional[str]
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=TodoPage)
+async def read_all(user: user_dependency, db: db_dependency, page: page_dependency):
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-    return db.query(Todos).filter(Todos.owner_id == user.get("id")).all()
+    # Pages are cached as serialized JSON, per owner, until the owner's next write
+    async def load_page() -> bytes:
+        todo_page = TodoPage.model_validate(await paginate_todos(db, owner_todos(user.get("id")), page))
+        return todo_page.model_dump_json().encode()
+
+    page_key = f"{page['limit']}:{page['cursor']}:{page['complete']}:{page['priority']}"
+    body = await todo_cache.get_or_load(user.get("id"), page_key, load_page)
+    return Response(content=body, media_type="application/json")
 
 
-@router.get("/todo/{todo_id}", status_code=status.HTTP_200_OK)
+@router.get("/todo/{todo_id}", status_code=status.HTTP_200_OK, response_model=TodoResponse)
 async def read_todo(user : user_dependency , db: db_dependency, todo_id: int = Path(gt=0)):
     if user is None:
 
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).filter(Todos.owner_id == user.get("id")).first()
-    if todo_model is not None:
-        return todo_model
+    result = await db.execute(owner_todo(user.get("id"), todo_id))
+    todo_row = result.first()
+    if todo_row is not None:
+        return todo_row
     raise HTTPException(status_code=404, detail="Todo not found")
 
 
@@ -59,8 +89,9 @@ async def create_todo(user: user_dependency, db: db_dependency, todo_request: To
     todo_model = Todos(**todo_request.dict(), owner_id=user.get("id"))
 
     db.add(todo_model)
-    db.commit()
-    db.refresh(todo_model)  # Return the created item
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
+    await db.refresh(todo_model)  # Return the created item
     return todo_model
 
 
@@ -69,17 +100,13 @@ async def update_todo(user : user_dependency ,db: db_dependency, todo_id: int, t
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).filter(Todos.owner_id == user.get("id")).first()
-    if todo_model is None:
+    values = {"title": todo_request.title, "description": todo_request.description,
+              "priority": todo_request.priority}
+    updated_id = await db.scalar(update_owner_todo(user.get("id"), todo_id, values))
+    if updated_id is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    todo_model.title = todo_request.title
-    todo_model.description = todo_request.description  # Fixed typo
-    todo_model.priority = todo_request.priority
-
-    db.commit()
-    return todo_model  # Optionally return the updated model
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
 
 
 @router.delete("/todo/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -87,13 +114,91 @@ async def delete_todo(user : user_dependency , db: db_dependency, todo_id: int =
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-
-    todo_model = db.query(Todos).filter(Todos.id == todo_id).filter(Todos.owner_id == user.get("id")).first()
-    if todo_model is None:
+    deleted_id = await db.scalar(delete_owner_todo(user.get("id"), todo_id))
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Todo not found")
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
+
 
-    db.query(Todos).filter(Todos.id == todo_id).filter(Todos.owner_id == user.get("id")).first()
+# Bulk endpoints validate each item on its own, so one bad item is reported by its
+# index instead of rejecting the whole list, and write the valid ones in one transaction.
+def check_bulk_size(items: list):
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} todos per request")
 
 
-    db.delete(todo_model)
-    db.commit()
+def validate_items(items: list) -> tuple[list, list]:
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, TodoRequest.model_validate(item)))
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": exc.errors(include_url=False, include_context=False)})
+    return valid, errors
+
+
+@router.post("/todos/bulk", status_code=status.HTTP_201_CREATED)
+async def create_todos(user: user_dependency, db: db_dependency, items: Annotated[list[Any], Body()]):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    check_bulk_size(items)
+
+    valid, errors = validate_items(items)
+    # Ids already in the table, or repeated earlier in the list, are reported per item
+    taken = set(await db.scalars(existing_todo_ids([todo.id for _, todo in valid]))) if valid else set()
+    rows = []
+    for index, todo in valid:
+        if todo.id in taken:
+            errors.append({"index": index, "errors": [ID_TAKEN_ERROR]})
+        else:
+            taken.add(todo.id)
+            rows.append({**todo.model_dump(), "owner_id": user.get("id")})
+    if rows:
+        # One executemany for the whole list; ids are part of TodoRequest, so no RETURNING is needed
+        try:
+            await db.execute(insert(Todos), rows)
+        except IntegrityError:
+            # Another request took one of the ids after the check above
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Todo id already exists")
+        await db.commit()
+        await todo_cache.invalidate(user.get("id"))
+    return {"ids": [row["id"] for row in rows], "errors": sorted(errors, key=lambda error: error["index"])}
+
+
+@router.put("/todos/bulk", status_code=status.HTTP_200_OK)
+async def update_todos(user: user_dependency, db: db_dependency, items: Annotated[list[Any], Body()]):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    check_bulk_size(items)
+
+    valid, errors = validate_items(items)
+    owned = set(await db.scalars(owned_todo_ids(user.get("id"), [todo.id for _, todo in valid])))
+    rows = []
+    for index, todo in valid:
+        if todo.id in owned:
+            rows.append({"b_id": todo.id, "b_title": todo.title, "b_description": todo.description,
+                         "b_priority": todo.priority})
+        else:
+            errors.append({"index": index, "errors": [NOT_FOUND_ERROR]})
+    if rows:
+        await db.execute(bulk_update_owner_todos(user.get("id")), rows)
+        await db.commit()
+        await todo_cache.invalidate(user.get("id"))
+    return {"ids": [row["b_id"] for row in rows], "errors": sorted(errors, key=lambda error: error["index"])}
+
+
+@router.post("/todos/bulk/complete", status_code=status.HTTP_200_OK)
+async def complete_todos(user: user_dependency, db: db_dependency, todo_ids: Annotated[list[int], Body()]):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    check_bulk_size(todo_ids)
+
+    completed = set(await db.scalars(complete_owner_todos(user.get("id"), todo_ids)))
+    await db.commit()
+    if completed:
+        await todo_cache.invalidate(user.get("id"))
+    errors = [{"index": index, "errors": [NOT_FOUND_ERROR]}
+              for index, todo_id in enumerate(todo_ids) if todo_id not in completed]
+    return {"ids": [todo_id for todo_id in todo_ids if todo_id in completed], "errors": errors}
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# memory: per-process LRU (fine for one worker); redis: shared by all workers; none: disabled
+TODO_CACHE_BACKEND = os.getenv("TODO_CACHE_BACKEND", "memory")
+TODO_CACHE_SIZE = int(os.getenv("TODO_CACHE_SIZE", "10000"))
+TODO_CACHE_TTL = float(os.getenv("TODO_CACHE_TTL", "60"))
+TODO_CACHE_REDIS_URL = os.getenv("TODO_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# How long a worker holds the fill lock, and how often the others look for the filled entry
+TODO_CACHE_LOCK_TTL = float(os.getenv("TODO_CACHE_LOCK_TTL", "5"))
+TODO_CACHE_POLL_SECONDS = 0.02
+
+
+# Backends store bytes under string keys. Version counters are kept apart from the
+# LRU so evicting them can never bring back entries written under an older version.
+class MemoryBackend:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.counters = {}
+
+    async def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self.entries.pop(key, None)
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def add(self, key: str, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, b"1", ttl)
+        return True
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    async def get_counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+    async def incr(self, key: str):
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+
+# Works with redis.asyncio.Redis or any client with the same API (e.g. fakeredis in tests).
+# Redis being down turns reads into misses instead of failing the request.
+class RedisBackend:
+    def __init__(self, client):
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self.errors = (RedisError, OSError)
+
+    async def get(self, key: str):
+        try:
+            return await self.client.get(key)
+        except self.errors as exc:
+            logger.warning("Todo cache read failed: %r", exc)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        try:
+            await self.client.set(key, value, px=int(ttl * 1000))
+        except self.errors as exc:
+            logger.warning("Todo cache write failed: %r", exc)
+
+    async def add(self, key: str, ttl: float) -> bool:
+        try:
+            return bool(await self.client.set(key, b"1", px=int(ttl * 1000), nx=True))
+        except self.errors:
+            return True
+
+    async def delete(self, key: str):
+        try:
+            await self.client.delete(key)
+        except self.errors:
+            pass
+
+    async def get_counter(self, key: str) -> int:
+        value = await self.get(key)
+        return int(value) if value is not None else 0
+
+    async def incr(self, key: str):
+        try:
+            await self.client.incr(key)
+        except self.errors as exc:
+            logger.warning("Todo cache invalidation failed, entries expire after the TTL: %r", exc)
+
+
+# Read-through cache of serialized todo pages, keyed per owner. Every write bumps the
+# owner's version, so the next read builds a new key and the old entries just age out.
+# Concurrent misses for one key share a single load: in-process through a shared task,
+# across workers through a short fill lock in the backend.
+class TodoListCache:
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.loading = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    async def key(self, owner_id, page_key: str) -> str:
+        version = await self.backend.get_counter(f"todos:version:{owner_id}")
+        return f"todos:{owner_id}:{version}:{page_key}"
+
+    async def get_or_load(self, owner_id, page_key: str, loader) -> bytes:
+        if self.backend is None:
+            return await loader()
+        key = await self.key(owner_id, page_key)
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        task = self.loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.fill(key, loader))
+            self.loading[key] = task
+            task.add_done_callback(lambda _: self.loading.pop(key, None))
+        # shield: a cancelled request must not cancel the load other requests are waiting on
+        return await asyncio.shield(task)
+
+    async def fill(self, key: str, loader) -> bytes:
+        lock_key = f"{key}:lock"
+        locked = await self.backend.add(lock_key, TODO_CACHE_LOCK_TTL)
+        if not locked:
+            # Another worker is loading this page; wait for its result up to the lock TTL
+            deadline = time.monotonic() + TODO_CACHE_LOCK_TTL
+            while time.monotonic() < deadline:
+                await asyncio.sleep(TODO_CACHE_POLL_SECONDS)
+                value = await self.backend.get(key)
+                if value is not None:
+                    return value
+        try:
+            self.loads += 1
+            value = await loader()
+            await self.backend.set(key, value, self.ttl)
+            return value
+        finally:
+            if locked:
+                await self.backend.delete(lock_key)
+
+    async def invalidate(self, owner_id):
+        if self.backend is not None:
+            await self.backend.incr(f"todos:version:{owner_id}")
+
+    def metrics(self) -> dict:
+        return {"backend": type(self.backend).__name__, "hits": self.hits, "misses": self.misses,
+                "loads": self.loads, "loading": len(self.loading)}
+
+
+def build_backend(name: str):
+    if name == "memory":
+        return MemoryBackend(TODO_CACHE_SIZE)
+    if name == "redis":
+        import redis.asyncio
+
+        return RedisBackend(redis.asyncio.Redis.from_url(TODO_CACHE_REDIS_URL))
+    return None
+
+
+todo_cache = TodoListCache(build_backend(TODO_CACHE_BACKEND), TODO_CACHE_TTL)
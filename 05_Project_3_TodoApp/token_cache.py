@@ -0,0 +1,68 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+# How many verified tokens to remember and for how long (never past the token's own exp); 0 disables caching
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+
+# LRU cache of verified token claims, keyed by a digest of the token so raw tokens are not kept around.
+# Revocations are remembered until the token would have expired anyway (in this process only).
+class TokenCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # digest -> (expires_at, claims)
+        self.revoked = {}  # digest -> token exp
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self.digest(token)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, claims: dict, exp: float = None):
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        if expires_at <= time.time():
+            return
+        key = self.digest(token)
+        self.entries[key] = (expires_at, claims)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def revoke(self, token: str, exp: float = None):
+        now = time.time()
+        if exp is None:
+            exp = now + self.ttl
+        self.revoked = {key: until for key, until in self.revoked.items() if until > now}
+        key = self.digest(token)
+        self.entries.pop(key, None)
+        self.revoked[key] = exp
+
+    def is_revoked(self, token: str) -> bool:
+        exp = self.revoked.get(self.digest(token))
+        return exp is not None and exp > time.time()
+
+    def clear(self):
+        self.entries.clear()
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
@@ -0,0 +1,63 @@
+# Cost per rendered home page for users with 10, 1k and 10k todos, with the
+# development template settings (auto-reload) and the production ones, plus the
+# first render in a fresh environment with and without the bytecode cache.
+# Usage: python bench_render.py --runs 20
+import argparse
+import time
+from types import SimpleNamespace
+
+from fastapi.templating import Jinja2Templates
+from starlette.requests import Request
+
+from main import app
+from templating import create_environment
+
+SIZES = (10, 1_000, 10_000)
+
+
+def fake_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/todos/", "root_path": "", "scheme": "http",
+                    "query_string": b"", "headers": [], "server": ("testserver", 80), "app": app,
+                    "router": app.router})
+
+
+def fake_todos(count: int) -> list:
+    return [SimpleNamespace(id=todo_id, title=f"Todo number {todo_id}", complete=todo_id % 3 == 0)
+            for todo_id in range(1, count + 1)]
+
+
+def render_ms(templates: Jinja2Templates, todos: list, runs: int) -> float:
+    context = {"request": fake_request(), "todos": todos, "user": {"username": "bench", "id": 1}}
+    template = templates.get_template("home.html")
+    template.render(context)
+    start = time.perf_counter()
+    for _ in range(runs):
+        templates.get_template("home.html").render(context)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+# A fresh environment is what a newly started worker has: every template gets compiled on first use
+def first_render_ms(bytecode_cache: bool) -> float:
+    environment = create_environment(production=True)
+    if not bytecode_cache:
+        environment.bytecode_cache = None
+    templates = Jinja2Templates(env=environment)
+    start = time.perf_counter()
+    templates.get_template("home.html").render(request=fake_request(), todos=fake_todos(10), user=None)
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Home page render cost by number of todos")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, production in (("development", False), ("production", True)):
+        templates = Jinja2Templates(env=create_environment(production))
+        results = ", ".join(f"{size} todos {render_ms(templates, fake_todos(size), args.runs):.2f} ms"
+                            for size in SIZES)
+        print(f"{label:>11}: {results}")
+
+    first_render_ms(bytecode_cache=True)  # make sure the cache is populated
+    print(f"first render in a new worker: {first_render_ms(bytecode_cache=False):.2f} ms without bytecode cache, "
+          f"{first_render_ms(bytecode_cache=True):.2f} ms with it")
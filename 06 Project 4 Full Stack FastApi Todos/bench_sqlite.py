@@ -0,0 +1,101 @@
+# Mixed read/write throughput against SQLite: default connection settings
+# against the tuned profile in database.py (pragmas + read-only pool for reads).
+# Each profile gets a fresh database file in a temporary directory.
+# Usage: python bench_sqlite.py --threads 16 --duration 10 --read-ratio 0.9
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_sqlite_engine
+
+USERS = 50
+
+
+def default_sessions(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    sessions = sessionmaker(autoflush=False, bind=engine)
+    return engine, sessions, sessions
+
+
+def tuned_sessions(path: str):
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+    read_engine = create_sqlite_engine(f"sqlite:///file:{path}?mode=ro&uri=true", read_only=True, pool_size=32)
+    return engine, sessionmaker(autoflush=False, bind=engine), sessionmaker(autoflush=False, bind=read_engine)
+
+
+# The home page query and the add-todo form post
+def read(sessions, owner_id: int):
+    with sessions() as db:
+        db.query(models.Todos).filter(models.Todos.owner_id == owner_id).all()
+
+
+def write(sessions, owner_id: int):
+    with sessions() as db:
+        db.add(models.Todos(title="bench", description="bench", priority=1, complete=False, owner_id=owner_id))
+        db.commit()
+
+
+def worker(write_sessions, read_sessions, read_ratio: float, deadline: float, results: dict, lock):
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    while time.perf_counter() < deadline:
+        owner_id = random.randint(1, USERS)
+        try:
+            if random.random() < read_ratio:
+                read(read_sessions, owner_id)
+                counts["reads"] += 1
+            else:
+                write(write_sessions, owner_id)
+                counts["writes"] += 1
+        except OperationalError:  # "database is locked"
+            counts["errors"] += 1
+    with lock:
+        for key, value in counts.items():
+            results[key] += value
+
+
+def run(label: str, make_sessions, args):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "todos.db")
+        engine, write_sessions, read_sessions = make_sessions(path)
+        models.Base.metadata.create_all(bind=engine)
+        with write_sessions() as db:
+            db.add_all(models.Users(email=f"user{i}@example.com", username=f"user{i}") for i in range(1, USERS + 1))
+            db.add_all(models.Todos(title="seed", description="seed", priority=1, complete=False,
+                                    owner_id=i % USERS + 1) for i in range(args.seed))
+            db.commit()
+
+        results, lock = {"reads": 0, "writes": 0, "errors": 0}, threading.Lock()
+        deadline = time.perf_counter() + args.duration
+        threads = [threading.Thread(target=worker, args=(write_sessions, read_sessions, args.read_ratio,
+                                                         deadline, results, lock))
+                   for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        read_sessions.kw["bind"].dispose()
+
+    print(f"{label:>8}: {(results['reads'] + results['writes']) / args.duration:8.0f} ops/s "
+          f"(reads {results['reads'] / args.duration:.0f}/s, writes {results['writes'] / args.duration:.0f}/s, "
+          f"locked errors {results['errors']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mixed read/write SQLite throughput")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=5000, help="todos in the database before the run")
+    args = parser.parse_args()
+
+    run("default", default_sessions, args)
+    run("tuned", tuned_sessions, args)
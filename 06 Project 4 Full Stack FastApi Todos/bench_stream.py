@@ -0,0 +1,64 @@
+# Time to first byte, total time and peak Python memory for the home page,
+# rendered whole (.all() + render) against streamed (yield_per + generate()).
+# Usage: python bench_stream.py --todos 1000 10000 100000
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import sessionmaker
+
+import models
+from bench_render import fake_request
+from database import create_sqlite_engine
+from routers.todos import stream_home
+from templating import templates
+
+USER = {"username": "bench", "id": 1}
+
+
+def buffered(session_factory):
+    with session_factory() as db:
+        todos = db.query(models.Todos).filter(models.Todos.owner_id == USER["id"]).all()
+        yield templates.get_template("home.html").render(request=fake_request(), todos=todos, user=USER)
+
+
+def streamed(session_factory):
+    yield from stream_home(fake_request(), USER, session_factory)
+
+
+def measure(render, session_factory) -> tuple[float, float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    for _ in render(session_factory):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte * 1000, total * 1000, peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buffered against streamed home page rendering")
+    parser.add_argument("--todos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, 'todos.db')}")
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+        for count in args.todos:
+            with session_factory() as db:
+                db.query(models.Todos).delete()
+                db.bulk_insert_mappings(models.Todos, [
+                    {"title": f"Todo number {i}", "description": "benchmark", "priority": 1,
+                     "complete": i % 3 == 0, "owner_id": USER["id"]} for i in range(count)])
+                db.commit()
+            for label, render in (("buffered", buffered), ("streamed", streamed)):
+                first_byte, total, peak = measure(render, session_factory)
+                print(f"{count:>7} todos {label}: first byte {first_byte:8.1f} ms, total {total:8.1f} ms, "
+                      f"peak memory {peak:6.1f} MiB")
+        engine.dispose()
@@ -0,0 +1,69 @@
+# Fingerprint and precompress the CSS/JS under static/ into static/build/, and write
+# static/build/manifest.json mapping each source path to its hashed file.
+# Run it before starting the app (and after every asset change):
+#   pip install brotli   (optional; without it only gzip variants are written)
+#   python build_static.py
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+STATIC_DIRECTORY = "static"
+BUILD_DIRECTORY = os.path.join(STATIC_DIRECTORY, "build")
+MANIFEST_PATH = os.path.join(BUILD_DIRECTORY, "manifest.json")
+EXTENSIONS = (".css", ".js")
+
+
+def compress_brotli(data: bytes):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+# Compressed variants sit next to the file they encode; they are only kept when smaller
+def write_variants(path: str, data: bytes) -> dict:
+    sizes = {"raw": len(data)}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0), ".br": compress_brotli(data)}
+    for suffix, encoded in variants.items():
+        if encoded is not None and len(encoded) < len(data):
+            with open(path + suffix, "wb") as file:
+                file.write(encoded)
+            sizes[suffix] = len(encoded)
+    return sizes
+
+
+def build() -> dict:
+    shutil.rmtree(BUILD_DIRECTORY, ignore_errors=True)
+    manifest = {}
+    for root, directories, files in os.walk(STATIC_DIRECTORY):
+        directories[:] = [name for name in directories if os.path.join(root, name) != BUILD_DIRECTORY]
+        for name in sorted(files):
+            if not name.endswith(EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            with open(source, "rb") as file:
+                data = file.read()
+
+            # The content hash goes into the file name, so a changed file gets a new URL
+            relative = os.path.relpath(source, STATIC_DIRECTORY).replace(os.sep, "/")
+            stem, extension = os.path.splitext(relative)
+            hashed = f"build/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+            target = os.path.join(STATIC_DIRECTORY, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as file:
+                file.write(data)
+
+            sizes = write_variants(target, data)
+            manifest[relative] = hashed
+            print(f"{relative} -> {hashed} " + " ".join(f"{key}={value}" for key, value in sizes.items()))
+
+    with open(MANIFEST_PATH, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    build()
@@ -2,13 +2,13 @@ from fastapi import FastAPI, Depends
 import models
 from database import engine
 from routers import auth, todos
-from starlette.staticfiles import StaticFiles
+from static_files import PrecompressedStaticFiles
 
 app = FastAPI()
 
 models.Base.metadata.create_all(bind=engine)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 app.include_router(auth.router)
 app.include_router(todos.router)
@@ -0,0 +1,104 @@
+# Server CPU and bytes transferred per todo action: the redirect flow (mutation, 302,
+# full /todos page) against the partial flow (mutation returns only the changed row).
+# Runs in-process against a temporary SQLite database holding --todos todos for one user.
+# Usage: python measure_actions.py --todos 100 1000 --runs 20
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import models
+import routers.todos
+from database import create_sqlite_engine
+from main import app
+from routers.auth import create_access_token
+
+PARTIAL_HEADERS = {"HX-Request": "true"}
+
+
+def transferred_bytes(response) -> int:
+    responses = list(response.history) + [response]
+    return sum(len(item.content) + sum(len(key) + len(value) + 4 for key, value in item.headers.items())
+               for item in responses)
+
+
+# process_time covers the app and the in-process client alike, so compare flows rather than absolutes
+def measure(client: TestClient, action, runs: int, headers: dict) -> tuple[float, float, int]:
+    cpu, size, requests = 0.0, 0, 0
+    for run in range(runs):
+        start = time.process_time()
+        response = action(client, run, headers)
+        cpu += time.process_time() - start
+        size += transferred_bytes(response)
+        requests += len(response.history) + 1
+        assert response.status_code == 200, response.status_code
+    return cpu / runs * 1000, size / runs, requests // runs
+
+
+def complete(client, run, headers):
+    return client.get(f"/todos/complete/{run + 1}", headers=headers)
+
+
+def edit(client, run, headers):
+    return client.post(f"/todos/edit-todo/{run + 1}", headers=headers,
+                       data={"title": f"edited {run}", "description": "edited", "priority": 2})
+
+
+def create(client, run, headers):
+    return client.post("/todos/add-todo", headers=headers,
+                       data={"title": f"new {run}", "description": "new", "priority": 1})
+
+
+def delete(client, run, headers):
+    # Delete the todos created by the matching create runs, so the list size stays put
+    todo_id = client.delete_ids.pop()
+    return client.get(f"/todos/delete/{todo_id}", headers=headers)
+
+
+def seed(session_factory, count: int):
+    with session_factory() as db:
+        db.query(models.Todos).delete()
+        db.bulk_insert_mappings(models.Todos, [
+            {"id": i, "title": f"Todo number {i}", "description": "measure", "priority": 1,
+             "complete": False, "owner_id": 1} for i in range(1, count + 1)])
+        db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU and bytes per todo action, redirect against partial")
+    parser.add_argument("--todos", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "todos.db")
+        engine = create_sqlite_engine(f"sqlite:///{path}")
+        models.Base.metadata.create_all(bind=engine)
+        read_engine = create_sqlite_engine(f"sqlite:///file:{path}?mode=ro&uri=true", read_only=True)
+        routers.todos.SessionLocal = sessionmaker(autoflush=False, bind=engine)
+        routers.todos.ReadSessionLocal = sessionmaker(autoflush=False, bind=read_engine)
+
+        client = TestClient(app)
+        client.cookies.set("access_token", create_access_token("measure", 1, timedelta(hours=1)))
+        for count in args.todos:
+            print(f"{count} todos:")
+            for name, action in (("complete", complete), ("edit", edit), ("create", create), ("delete", delete)):
+                results = {}
+                for flow, headers in (("redirect", {}), ("partial", PARTIAL_HEADERS)):
+                    seed(routers.todos.SessionLocal, count)
+                    client.delete_ids = [count + run + 1 for run in range(args.runs)]
+                    if name == "delete":
+                        for run in range(args.runs):
+                            create(client, run, PARTIAL_HEADERS)
+                    results[flow] = measure(client, action, args.runs, headers)
+                (redirect_cpu, redirect_bytes, redirect_requests), (partial_cpu, partial_bytes, partial_requests) = \
+                    results["redirect"], results["partial"]
+                print(f"  {name:>8}: redirect {redirect_cpu:6.2f} ms CPU, {redirect_bytes:8.0f} B, "
+                      f"{redirect_requests} requests | partial {partial_cpu:6.2f} ms CPU, {partial_bytes:6.0f} B, "
+                      f"{partial_requests} request")
+        engine.dispose()
+        read_engine.dispose()
@@ -7,7 +7,7 @@ from fastapi import Depends, HTTPException, status, APIRouter, Request, Response
 from pydantic import BaseModel
 from typing import Optional
 import models
-from passlib.context import CryptContext
+import hashing
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
@@ -15,16 +15,12 @@ from datetime import datetime, timedelta
 from jose import jwt, JWTError
 
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from templating import templates
 
 
 SECRET_KEY = "KlgH6AzYDeZeGwD288to79I3vTHT8wp7"
 ALGORITHM = "HS256"
 
-templates = Jinja2Templates(directory="templates")
-
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 models.Base.metadata.create_all(bind=engine)
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="token")
@@ -57,22 +53,23 @@ def get_db():
         db.close()
 
 
-def get_password_hash(password):
-    return bcrypt_context.hash(password)
+# bcrypt runs in the hashing process pool; both raise hashing.HashingBusy when it is saturated
+async def get_password_hash(password):
+    return await hashing.hash_password(password)
 
 
-def verify_password(plain_password, hashed_password):
-    return bcrypt_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await hashing.verify_password(plain_password, hashed_password)
 
 
-def authenticate_user(username: str, password: str, db):
+async def authenticate_user(username: str, password: str, db):
     user = db.query(models.Users)\
         .filter(models.Users.username == username)\
         .first()
 
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -107,7 +104,11 @@ async def get_current_user(request: Request):
 @router.post("/token")
 async def login_for_access_token(response: Response, form_data: OAuth2PasswordRequestForm = Depends(),
                                  db: Session = Depends(get_db)):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password, db)
+    except hashing.HashingBusy:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many login attempts",
+                            headers={"Retry-After": str(hashing.HASH_RETRY_AFTER_SECONDS)})
     if not user:
         return False
     token_expires = timedelta(minutes=60)
@@ -122,7 +123,7 @@ async def login_for_access_token(response: Response, form_data: OAuth2PasswordRe
 
 @router.get("/", response_class=HTMLResponse)
 async def authentication_page(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return templates.TemplateResponse(request, "login.html")
 
 
 @router.post("/", response_class=HTMLResponse)
@@ -136,24 +137,28 @@ async def login(request: Request, db: Session = Depends(get_db)):
 
         if not validate_user_cookie:
             msg = "Incorrect Username or Password"
-            return templates.TemplateResponse("login.html", {"request": request, "msg": msg})
+            return templates.TemplateResponse(request, "login.html", {"msg": msg})
         return response
-    except HTTPException:
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            msg = "Too many login attempts, please try again in a moment"
+            return templates.TemplateResponse(request, "login.html", {"msg": msg},
+                                              status_code=exc.status_code, headers=exc.headers)
         msg = "Unknown Error"
-        return templates.TemplateResponse("login.html", {"request": request, "msg": msg})
+        return templates.TemplateResponse(request, "login.html", {"msg": msg})
 
 
 @router.get("/logout")
 async def logout(request: Request):
     msg = "Logout Successful"
-    response = templates.TemplateResponse("login.html", {"request": request, "msg": msg})
+    response = templates.TemplateResponse(request, "login.html", {"msg": msg})
     response.delete_cookie(key="access_token")
     return response
 
 
 @router.get("/register", response_class=HTMLResponse)
 async def register(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return templates.TemplateResponse(request, "register.html")
 
 
 @router.post("/register", response_class=HTMLResponse)
@@ -168,7 +173,7 @@ async def register_user(request: Request, email: str = Form(...), username: str
 
     if password != password2 or validation1 is not None or validation2 is not None:
         msg = "Invalid registration request"
-        return templates.TemplateResponse("register.html", {"request": request, "msg": msg})
+        return templates.TemplateResponse(request, "register.html", {"msg": msg})
 
     user_model = models.Users()
     user_model.username = username
@@ -176,7 +181,13 @@ async def register_user(request: Request, email: str = Form(...), username: str
     user_model.first_name = firstname
     user_model.last_name = lastname
 
-    hash_password = get_password_hash(password)
+    try:
+        hash_password = await get_password_hash(password)
+    except hashing.HashingBusy:
+        msg = "Too many requests, please try again in a moment"
+        return templates.TemplateResponse(request, "register.html", {"msg": msg},
+                                          status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                          headers={"Retry-After": str(hashing.HASH_RETRY_AFTER_SECONDS)})
     user_model.hashed_password = hash_password
     user_model.is_active = True
 
@@ -184,4 +195,4 @@ async def register_user(request: Request, email: str = Form(...), username: str
     db.commit()
 
     msg = "User successfully created"
-    return templates.TemplateResponse("login.html", {"request": request, "msg": msg})
+    return templates.TemplateResponse(request, "login.html", {"msg": msg})
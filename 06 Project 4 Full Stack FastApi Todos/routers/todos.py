@@ -1,17 +1,18 @@
+import os
 import sys
 sys.path.append("..")
 
 from starlette import status
 from starlette.responses import RedirectResponse
 
-from fastapi import Depends, APIRouter, Request, Form
+from fastapi import Depends, APIRouter, HTTPException, Request, Form
 import models
-from database import engine, SessionLocal
+from database import engine, SessionLocal, ReadSessionLocal
 from sqlalchemy.orm import Session
 from .auth import get_current_user
 
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, StreamingResponse
+from templating import stream_template, templates
 
 
 router = APIRouter(
@@ -22,8 +23,10 @@ router = APIRouter(
 
 models.Base.metadata.create_all(bind=engine)
 
-templates = Jinja2Templates(directory="templates")
-
+# stream: send the home page while its rows are still being fetched; buffered: render it whole
+HOME_RENDER_MODE = os.getenv("HOME_RENDER_MODE", "stream")
+# Rows fetched per round trip while the home page streams
+HOME_STREAM_BATCH_SIZE = int(os.getenv("HOME_STREAM_BATCH_SIZE", "500"))
 
 def get_db():
     try:
@@ -33,16 +36,66 @@ def get_db():
         db.close()
 
 
+# GET pages read through the read-only pool, so they never queue behind form posts for the write lock
+def get_read_db():
+    try:
+        db = ReadSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
 @router.get("/", response_class=HTMLResponse)
-async def read_all_by_user(request: Request, db: Session = Depends(get_db)):
+async def read_all_by_user(request: Request, db: Session = Depends(get_read_db)):
 
     user = await get_current_user(request)
     if user is None:
         return RedirectResponse(url="/auth", status_code=status.HTTP_302_FOUND)
 
+    if HOME_RENDER_MODE == "stream":
+        return StreamingResponse(stream_home(request, user), media_type="text/html")
+
     todos = db.query(models.Todos).filter(models.Todos.owner_id == user.get("id")).all()
 
-    return templates.TemplateResponse("home.html", {"request": request, "todos": todos, "user": user})
+    return templates.TemplateResponse(request, "home.html", {"todos": todos, "user": user})
+
+
+# The streaming generator outlives the request's dependencies, so it opens its own session.
+# yield_per keeps only one batch of rows in memory however long the list is.
+def stream_home(request: Request, user: dict, session_factory=None):
+    db = (session_factory or ReadSessionLocal)()
+    try:
+        todos = db.query(models.Todos).filter(models.Todos.owner_id == user.get("id"))\
+            .yield_per(HOME_STREAM_BATCH_SIZE)
+        yield from stream_template("home.html", {"request": request, "todos": todos, "user": user})
+    finally:
+        db.close()
+
+
+# Requests sent by static/todo/js/todo.js get just the changed row back instead of a
+# redirect that re-renders the whole list; plain form posts and links still redirect.
+# The same URL answers both ways, so every such response varies on the header.
+VARY_HX_REQUEST = {"Vary": "HX-Request"}
+
+
+def partial_request(request: Request) -> bool:
+    return request.headers.get("HX-Request") == "true"
+
+
+def row_response(request: Request, todo: models.Todos):
+    return templates.TemplateResponse(request, "todo-row.html", {"todo": todo}, headers=VARY_HX_REQUEST)
+
+
+def list_redirect():
+    return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND, headers=VARY_HX_REQUEST)
+
+
+def get_owner_todo(db: Session, user: dict, todo_id: int) -> models.Todos:
+    todo = db.query(models.Todos).filter(models.Todos.id == todo_id)\
+        .filter(models.Todos.owner_id == user.get("id")).first()
+    if todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found", headers=VARY_HX_REQUEST)
+    return todo
 
 
 @router.get("/add-todo", response_class=HTMLResponse)
@@ -51,7 +104,7 @@ async def add_new_todo(request: Request):
     if user is None:
         return RedirectResponse(url="/auth", status_code=status.HTTP_302_FOUND)
 
-    return templates.TemplateResponse("add-todo.html", {"request": request, "user": user})
+    return templates.TemplateResponse(request, "add-todo.html", {"user": user})
 
 
 @router.post("/add-todo", response_class=HTMLResponse)
@@ -71,19 +124,21 @@ async def create_todo(request: Request, title: str = Form(...), description: str
     db.add(todo_model)
     db.commit()
 
-    return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND)
+    if partial_request(request):
+        return row_response(request, todo_model)
+    return list_redirect()
 
 
 @router.get("/edit-todo/{todo_id}", response_class=HTMLResponse)
-async def edit_todo(request: Request, todo_id: int, db: Session = Depends(get_db)):
+async def edit_todo(request: Request, todo_id: int, db: Session = Depends(get_read_db)):
 
     user = await get_current_user(request)
     if user is None:
         return RedirectResponse(url="/auth", status_code=status.HTTP_302_FOUND)
 
-    todo = db.query(models.Todos).filter(models.Todos.id == todo_id).first()
+    todo = get_owner_todo(db, user, todo_id)
 
-    return templates.TemplateResponse("edit-todo.html", {"request": request, "todo": todo, "user": user})
+    return templates.TemplateResponse(request, "edit-todo.html", {"todo": todo, "user": user})
 
 
 @router.post("/edit-todo/{todo_id}", response_class=HTMLResponse)
@@ -95,7 +150,7 @@ async def edit_todo_commit(request: Request, todo_id: int, title: str = Form(...
     if user is None:
         return RedirectResponse(url="/auth", status_code=status.HTTP_302_FOUND)
 
-    todo_model = db.query(models.Todos).filter(models.Todos.id == todo_id).first()
+    todo_model = get_owner_todo(db, user, todo_id)
 
     todo_model.title = title
     todo_model.description = description
@@ -104,7 +159,9 @@ async def edit_todo_commit(request: Request, todo_id: int, title: str = Form(...
     db.add(todo_model)
     db.commit()
 
-    return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND)
+    if partial_request(request):
+        return row_response(request, todo_model)
+    return list_redirect()
 
 
 @router.get("/delete/{todo_id}")
@@ -117,14 +174,17 @@ async def delete_todo(request: Request, todo_id: int, db: Session = Depends(get_
     todo_model = db.query(models.Todos).filter(models.Todos.id == todo_id)\
         .filter(models.Todos.owner_id == user.get("id")).first()
 
-    if todo_model is None:
-        return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND)
-
-    db.query(models.Todos).filter(models.Todos.id == todo_id).delete()
+    if todo_model is None and not partial_request(request):
+        return list_redirect()
 
-    db.commit()
+    if todo_model is not None:
+        db.query(models.Todos).filter(models.Todos.id == todo_id).delete()
+        db.commit()
 
-    return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND)
+    # Nothing to swap in: the script removes the row
+    if partial_request(request):
+        return HTMLResponse("", headers=VARY_HX_REQUEST)
+    return list_redirect()
 
 
 @router.get("/complete/{todo_id}", response_class=HTMLResponse)
@@ -134,11 +194,13 @@ async def complete_todo(request: Request, todo_id: int, db: Session = Depends(ge
     if user is None:
         return RedirectResponse(url="/auth", status_code=status.HTTP_302_FOUND)
 
-    todo = db.query(models.Todos).filter(models.Todos.id == todo_id).first()
+    todo = get_owner_todo(db, user, todo_id)
 
     todo.complete = not todo.complete
 
     db.add(todo)
     db.commit()
 
-    return RedirectResponse(url="/todos", status_code=status.HTTP_302_FOUND)
+    if partial_request(request):
+        return row_response(request, todo)
+    return list_redirect()
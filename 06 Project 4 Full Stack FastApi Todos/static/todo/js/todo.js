@@ -0,0 +1,80 @@
+// Swaps server-rendered todo rows into the list instead of following a redirect
+// and re-rendering the whole page. Links and forms with data-swap are sent with an
+// HX-Request header; the server answers with one <tr> (or nothing, for a delete)
+// that is placed on the data-target element according to data-swap:
+//   replace - replace the target row with the returned row
+//   append  - append the returned row to the target (the list body)
+//   delete  - remove the target row
+// Without JavaScript the same links and forms still work through the redirects.
+(function () {
+    function renumber() {
+        var rows = document.querySelectorAll('#todo-rows > tr');
+        for (var i = 0; i < rows.length; i++) {
+            rows[i].cells[0].textContent = i + 1;
+        }
+    }
+
+    function swap(element, html) {
+        var target = document.querySelector(element.dataset.target);
+        var mode = element.dataset.swap;
+        if (target === null) {
+            window.location.reload();
+            return;
+        }
+        if (mode === 'delete') {
+            target.remove();
+        } else {
+            // A <template> parses a bare <tr> without needing a surrounding table
+            var template = document.createElement('template');
+            template.innerHTML = html.trim();
+            var row = template.content.firstElementChild;
+            if (mode === 'append') {
+                target.appendChild(row);
+            } else {
+                target.replaceWith(row);
+            }
+        }
+        renumber();
+    }
+
+    function send(element, url, options) {
+        options.headers = {'HX-Request': 'true'};
+        options.credentials = 'same-origin';
+        return fetch(url, options).then(function (response) {
+            // Logged out (redirect to /auth) or an error: let the browser show that page
+            if (response.redirected || !response.ok) {
+                window.location.href = response.url;
+                return;
+            }
+            return response.text().then(function (html) {
+                swap(element, html);
+            });
+        });
+    }
+
+    document.addEventListener('click', function (event) {
+        var link = event.target.closest('a[data-swap]');
+        if (link === null) {
+            return;
+        }
+        event.preventDefault();
+        send(link, link.href, {method: 'GET'}).catch(function () {
+            window.location.href = link.href;
+        });
+    });
+
+    document.addEventListener('submit', function (event) {
+        var form = event.target.closest('form[data-swap]');
+        if (form === null) {
+            return;
+        }
+        event.preventDefault();
+        send(form, form.action, {method: 'POST', body: new URLSearchParams(new FormData(form))})
+            .then(function () {
+                form.reset();
+            })
+            .catch(function () {
+                form.submit();
+            });
+    });
+})();
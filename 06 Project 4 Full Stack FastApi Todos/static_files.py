@@ -0,0 +1,53 @@
+import mimetypes
+import re
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Preferred first; each variant is the original path plus the suffix (written by build_static.py)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Files named like bootstrap.3f2a9c1b7d4e.css never change, so clients may keep them forever
+FINGERPRINT_PATTERN = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def accepted_encodings(header: str) -> set:
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+# StaticFiles that serves the precompressed .br/.gz variant when the client accepts it,
+# marks fingerprinted files immutable and lets everything else revalidate by ETag (304)
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope) -> FileResponse:
+        cache_control = IMMUTABLE_CACHE_CONTROL if FINGERPRINT_PATTERN.search(path) else REVALIDATE_CACHE_CONTROL
+        if scope["method"] in ("GET", "HEAD"):
+            request_headers = Headers(scope=scope)
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix in ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                    continue
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response = FileResponse(full_path, stat_result=stat_result, media_type=media_type)
+                response.headers["content-encoding"] = encoding
+                response.headers["vary"] = "Accept-Encoding"
+                response.headers["cache-control"] = cache_control
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+
+        response = await super().get_response(path, scope)
+        response.headers["cache-control"] = cache_control
+        response.headers["vary"] = "Accept-Encoding"
+        return response
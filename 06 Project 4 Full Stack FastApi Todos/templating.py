@@ -0,0 +1,76 @@
+import json
+import os
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+
+# In production templates are compiled once and never re-checked on disk;
+# in development edits still show up on the next request
+APP_ENV = os.getenv("APP_ENV", "development")
+TEMPLATE_DIRECTORY = "templates"
+# Compiled templates survive restarts, so a fresh worker skips the Jinja compile step. Cached
+# bytecode is executed as-is, so by default Jinja picks a private per-user directory (mode 0700,
+# owner checked); only point this at a directory no other user can write to.
+TEMPLATE_CACHE_DIRECTORY = os.getenv("TEMPLATE_CACHE_DIRECTORY")
+# Written by build_static.py; maps e.g. todo/css/bootstrap.css to its fingerprinted copy
+STATIC_MANIFEST_PATH = os.path.join("static", "build", "manifest.json")
+
+
+def load_static_manifest() -> dict:
+    try:
+        with open(STATIC_MANIFEST_PATH) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def create_environment(production: bool) -> jinja2.Environment:
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIRECTORY),
+        autoescape=jinja2.select_autoescape(),
+        auto_reload=not production,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIRECTORY),
+    )
+    fragments = {}
+
+    # Renders a partial that depends only on the given keyword arguments, once per
+    # distinct set of arguments (e.g. the navbar for logged-in and anonymous users)
+    def fragment(name: str, **context) -> Markup:
+        key = (name, tuple(sorted(context.items())))
+        if key not in fragments or environment.auto_reload:
+            fragments[key] = Markup(environment.get_template(name).render(**context))
+        return fragments[key]
+
+    environment.globals["fragment"] = fragment
+
+    # URL of a static asset: the fingerprinted build when there is one, the source file otherwise
+    static_manifest = load_static_manifest()
+
+    def static_url(path: str) -> str:
+        manifest = load_static_manifest() if environment.auto_reload else static_manifest
+        return "/static/" + manifest.get(path, path)
+
+    environment.globals["static_url"] = static_url
+    return environment
+
+
+# The one template environment shared by all routers
+templates = Jinja2Templates(env=create_environment(APP_ENV == "production"))
+
+# Streamed pages are sent in chunks of about this many characters rather than one write per template piece
+STREAM_CHUNK_SIZE = int(os.getenv("TEMPLATE_STREAM_CHUNK_SIZE", str(16 * 1024)))
+
+
+# Renders a template piece by piece with Jinja's generate(), so the start of the page is
+# sent while the rest (e.g. a loop over a lazy query) is still being produced
+def stream_template(name: str, context: dict, chunk_size: int = STREAM_CHUNK_SIZE):
+    buffer, size = [], 0
+    for piece in templates.get_template(name).generate(context):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
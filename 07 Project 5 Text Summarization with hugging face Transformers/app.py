@@ -1,66 +1,497 @@
 # pip install fastapi uvicorn transformers sentencepiece
 # pip install jinja2
-from fastapi import FastAPI, Request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from transformers import T5ForConditionalGeneration, T5Tokenizer
-from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from batcher import MicroBatcher
+from registry import ModelRegistry
+from summary_cache import SummaryCache
+import asyncio
+import bisect
+import json
+import logging
+import os
 import re
+import threading
+import time
 
-# Initialize FastAPI app
-app = FastAPI(title="Text Summarization System", description="Summarize dialogues with T5!", version="1.0")
+logger = logging.getLogger(__name__)
 
-# Load model and tokenizer
-model = T5ForConditionalGeneration.from_pretrained("./saved_summary_model")
-tokenizer = T5Tokenizer.from_pretrained("./saved_summary_model")
+MODEL_DIR = "./saved_summary_model"
+# Model backend: torch, quantized (int8) or onnx (ONNX Runtime), see backends.py
+SUMMARY_BACKEND = os.getenv("SUMMARY_BACKEND", "torch")
 
-# Ensure the model is on the correct device
-device = "cuda" if model.device.type == "cuda" else "cpu"
-model = model.to(device)
+# Model and tokenizer are loaded in the background on startup (see lifespan below)
+registry = ModelRegistry(SUMMARY_BACKEND, MODEL_DIR)
 
-# Mount templates
-templates = Jinja2Templates(directory="templates")
+# Warm-up batch run after loading so the first real request does not pay for it
+WARMUP_BATCH_SIZE = int(os.getenv("SUMMARY_WARMUP_BATCH_SIZE", "2"))
+WARMUP_TEXT = "amanda: i baked cookies. do you want some? jerry: sure! amanda: i'll bring you tomorrow :-)"
+
+# Inputs longer than this many tokens are truncated
+MAX_INPUT_LENGTH = int(os.getenv("SUMMARY_MAX_INPUT_LENGTH", "512"))
+# Upper bounds (in tokens) of the length buckets, so short and long dialogues are not padded together
+LENGTH_BUCKETS = [int(bound) for bound in os.getenv("SUMMARY_LENGTH_BUCKETS", "64,128,256").split(",")]
+
+# Beam search settings, also part of the cache key
+GENERATION_PARAMS = {"max_length": 150, "num_beams": 4, "early_stopping": True}
+# Streaming cannot follow several beams, so it decodes greedily (or samples on request)
+STREAM_GENERATION_PARAMS = {"max_length": 150, "num_beams": 1}
+SAMPLING_PARAMS = {"do_sample": True, "top_p": 0.9, "temperature": 0.8}
+
+# Long-input mode: overlap between token windows and how many windows go through generate at once
+LONG_WINDOW_OVERLAP = int(os.getenv("SUMMARY_LONG_WINDOW_OVERLAP", "64"))
+LONG_MAP_BATCH_SIZE = int(os.getenv("SUMMARY_LONG_MAP_BATCH_SIZE", "8"))
+
+# Batching knobs: how long to wait for more requests and how many to run together
+MAX_BATCH_SIZE = int(os.getenv("SUMMARY_MAX_BATCH_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.getenv("SUMMARY_BATCH_WINDOW_MS", "10"))
 
+# Inference pool: each worker already uses torch's intra-op threads (all cores unless
+# OMP_NUM_THREADS is set), so size the pool to fill the cores rather than one thread per core
+INTRA_OP_THREADS = int(os.getenv("OMP_NUM_THREADS", os.cpu_count() or 1))
+INFERENCE_WORKERS = int(os.getenv("SUMMARY_INFERENCE_WORKERS", max(1, (os.cpu_count() or 1) // INTRA_OP_THREADS)))
+MAX_QUEUE_SIZE = int(os.getenv("SUMMARY_MAX_QUEUE_SIZE", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("SUMMARY_RETRY_AFTER_SECONDS", "2"))
+
+# Dialogues per /summarize/batch request (bigger jobs belong in summarize_cli.py), and how
+# often a running batch request tries again to queue its next chunk while the queue is full
+BATCH_MAX_ITEMS = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", "1000"))
+BATCH_RETRY_SECONDS = 0.05
+
+# Summary cache: memory budget and optional SQLite file for a persistent tier
+CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH")
+# New disk entries are committed together at most this often
+CACHE_FLUSH_SECONDS = float(os.getenv("SUMMARY_CACHE_FLUSH_SECONDS", "1"))
 
 # Input schema for requests
 class DialogueInput(BaseModel):
     dialogue: str
 
 
+class StreamDialogueInput(DialogueInput):
+    sampling: bool = False
+
+
+# XML tags, matched after whitespace is collapsed so they can no longer contain line breaks
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
 # Clean text function
 def clean_text(text: str) -> str:
-    text = re.sub(r'\r\n', ' ', text)  # Remove carriage returns and line breaks
-    text = re.sub(r'\s+', ' ', text)  # Remove extra spaces
-    text = re.sub(r'<.*?>', '', text)  # Remove any XML tags
-    text = text.strip().lower()  # Strip and convert to lower case
-    return text
+    text = " ".join(text.split())  # Collapse line breaks and runs of whitespace in one pass
+    if "<" in text:
+        text = TAG_PATTERN.sub('', text)  # Remove any XML tags
+    return text.strip().lower()  # Strip and convert to lower case
 
 
-# Summarization function
-def summarize_dialogue(dialogue: str) -> str:
-    dialogue = clean_text(dialogue)
-    inputs = tokenizer(dialogue, return_tensors="pt", truncation=True, padding="max_length", max_length=512)
-    inputs = {key: value.to(device) for key, value in inputs.items()}
+# Group input positions by token length bucket
+def bucket_by_length(lengths: list[int]) -> list[list[int]]:
+    buckets = {}
+    for index, length in enumerate(lengths):
+        buckets.setdefault(bisect.bisect_left(LENGTH_BUCKETS, length), []).append(index)
+    return [buckets[key] for key in sorted(buckets)]
+
 
-    # Generate summary
-    outputs = model.generate(
+# One batched generate over already tokenized inputs, padded only to the longest one
+def generate_summaries(input_ids: list[list[int]]) -> list[str]:
+    features = [{"input_ids": ids, "attention_mask": [1] * len(ids)} for ids in input_ids]
+    inputs = registry.tokenizer.pad(features, padding="longest", return_tensors="pt")
+    inputs = {key: value.to(registry.device) for key, value in inputs.items()}
+
+    # Generate summaries
+    outputs = registry.model.generate(
         inputs["input_ids"],
-        max_length=150,
-        num_beams=4,
-        early_stopping=True
+        attention_mask=inputs["attention_mask"],
+        **GENERATION_PARAMS
     )
-    summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return summary
+    return registry.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+# Summarization function (one batched generate per length bucket), expects cleaned text
+def summarize_batch(dialogues: list[str]) -> list[str]:
+    encoded = registry.tokenizer(dialogues, truncation=True, max_length=MAX_INPUT_LENGTH)["input_ids"]
+    summaries = [None] * len(dialogues)
+
+    for indices in bucket_by_length([len(ids) for ids in encoded]):
+        for index, summary in zip(indices, generate_summaries([encoded[i] for i in indices])):
+            summaries[index] = summary
+    return summaries
+
+
+# Split token ids into overlapping windows that each fit the model input (with room for </s>)
+def split_windows(input_ids: list[int]) -> list[list[int]]:
+    size = MAX_INPUT_LENGTH - 1
+    step = max(1, size - LONG_WINDOW_OVERLAP)
+    eos = [registry.tokenizer.eos_token_id]
+    return [input_ids[start:start + size] + eos for start in range(0, max(1, len(input_ids) - LONG_WINDOW_OVERLAP), step)]
+
+
+# Map step: summarize every window, a bounded number at a time to cap peak memory
+def summarize_windows(text: str) -> list[str]:
+    windows = split_windows(registry.tokenizer(text, add_special_tokens=False)["input_ids"])
+    partials = []
+    for i in range(0, len(windows), LONG_MAP_BATCH_SIZE):
+        partials.extend(generate_summaries(windows[i:i + LONG_MAP_BATCH_SIZE]))
+    return partials
+
+
+# Long-input mode: map over overlapping windows, then reduce the partial summaries.
+# Returns the summary and per-stage timings in milliseconds.
+def summarize_long(text: str) -> tuple[str, dict]:
+    timings = {"map_ms": 0.0, "reduce_ms": 0.0, "windows": 0, "reduce_rounds": 0}
+
+    start = time.perf_counter()
+    partials = summarize_windows(text)
+    timings["map_ms"] = (time.perf_counter() - start) * 1000
+    timings["windows"] = len(partials)
+
+    start = time.perf_counter()
+    combined = " ".join(partials)
+    # Keep reducing while the joined partial summaries still do not fit in one window
+    while len(partials) > 1 and len(registry.tokenizer(combined)["input_ids"]) > MAX_INPUT_LENGTH:
+        partials = summarize_windows(combined)
+        combined = " ".join(partials)
+        timings["reduce_rounds"] += 1
+    if len(partials) > 1:
+        summary = summarize_batch([combined])[0]
+        timings["reduce_rounds"] += 1
+    else:
+        summary = combined
+    timings["reduce_ms"] = (time.perf_counter() - start) * 1000
+    return summary, timings
+
+
+def summarize_dialogue(dialogue: str) -> str:
+    return summarize_batch([clean_text(dialogue)])[0]
+
+
+# Cached summaries belong to the weights that were loaded: the cache takes their
+# fingerprint before the model is marked ready (see warmup), dropping entries from other weights
+summary_cache = SummaryCache(CACHE_MAX_BYTES, disk_path=CACHE_PATH, flush_seconds=CACHE_FLUSH_SECONDS)
+
+
+def warmup():
+    summary_cache.set_model_version(registry.fingerprint)
+    summarize_batch([WARMUP_TEXT] * WARMUP_BATCH_SIZE)
+
+
+def cache_key(text: str, mode: str = "single") -> str:
+    return summary_cache.make_key(text, {**GENERATION_PARAMS, "max_input_length": MAX_INPUT_LENGTH,
+                                         "backend": SUMMARY_BACKEND, "mode": mode})
+
+
+# Concurrent requests are grouped into a single generate call on the inference pool
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+batcher = MicroBatcher(summarize_batch, max_batch_size=MAX_BATCH_SIZE, batch_window_ms=BATCH_WINDOW_MS,
+                       executor=inference_executor, workers=INFERENCE_WORKERS, max_queue_size=MAX_QUEUE_SIZE)
+
+
+# Start loading the model in the background; the app serves health checks meanwhile
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().run_in_executor(inference_executor, registry.load, warmup)
+    yield
+    await batcher.stop()
+    await summary_cache.flush()
+    inference_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Initialize FastAPI app
+app = FastAPI(title="Text Summarization System", description="Summarize dialogues with T5!", version="1.0",
+              lifespan=lifespan)
+
+# Mount templates
+templates = Jinja2Templates(directory="templates")
+
+
+def require_model():
+    if not registry.ready:
+        raise HTTPException(status_code=503, detail=f"Model is not ready ({registry.state})",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+# Raised when the batcher queue, shared by every inference endpoint, is full
+def busy_error() -> HTTPException:
+    return HTTPException(status_code=503, detail="Summarizer is busy, try again later",
+                         headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
 
 
 # API endpoint for text summarization
 @app.post("/summarize/")
 async def summarize(dialogue_input: DialogueInput):
-    summary = summarize_dialogue(dialogue_input.dialogue)
+    require_model()
+    text = clean_text(dialogue_input.dialogue)
+    key = cache_key(text)
+    summary = await summary_cache.get(key)
+    if summary is not None:
+        return {"summary": summary}
+
+    try:
+        summary = await batcher.submit(text)
+    except asyncio.QueueFull:
+        raise busy_error()
+    await summary_cache.put(key, summary)
     return {"summary": summary}
 
 
+# Batch input is a JSON array or NDJSON; each item is a dialogue string or an
+# object with a "dialogue" field and an optional "id" that is echoed back
+def parse_batch_item(item, index: int) -> tuple:
+    if isinstance(item, str):
+        return index, item
+    if isinstance(item, dict) and isinstance(item.get("dialogue"), str):
+        return item.get("id", index), item["dialogue"]
+    raise ValueError(f"Item {index} must be a string or an object with a 'dialogue' string")
+
+
+def parse_batch_body(body: bytes, ndjson: bool) -> list[tuple]:
+    if ndjson:
+        items = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+    else:
+        items = json.loads(body)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of dialogues")
+    return [parse_batch_item(item, index) for index, item in enumerate(items)]
+
+
+# Cache lookups for one chunk of a batch request
+async def lookup_chunk(chunk: list[tuple]) -> tuple:
+    texts = [clean_text(dialogue) for _, dialogue in chunk]
+    keys = [cache_key(text) for text in texts]
+    summaries = [await summary_cache.get(key) for key in keys]
+    return texts, keys, summaries
+
+
+# Queue the cache misses of a chunk as one call on the batcher (None if there are none).
+# Raises asyncio.QueueFull.
+async def queue_misses(texts: list[str], summaries: list) -> asyncio.Future:
+    missing = [text for text, summary in zip(texts, summaries) if summary is None]
+    return await batcher.enqueue_call(summarize_batch, missing) if missing else None
+
+
+# Summarize items chunk by chunk, yielding NDJSON lines in input order. The first chunk
+# was queued by the endpoint; each later one waits for room in the queue, so a request
+# never holds more than one queue slot.
+async def summarize_items(items: list[tuple], first: tuple):
+    for start in range(0, len(items), MAX_BATCH_SIZE):
+        chunk = items[start:start + MAX_BATCH_SIZE]
+        if start == 0:
+            texts, keys, summaries, call = first
+        else:
+            texts, keys, summaries = await lookup_chunk(chunk)
+            while True:
+                try:
+                    call = await queue_misses(texts, summaries)
+                    break
+                except asyncio.QueueFull:
+                    await asyncio.sleep(BATCH_RETRY_SECONDS)
+
+        if call is not None:
+            missing = [i for i, summary in enumerate(summaries) if summary is None]
+            for i, summary in zip(missing, await call):
+                summaries[i] = summary
+                await summary_cache.put(keys[i], summary)
+
+        for (item_id, _), summary in zip(chunk, summaries):
+            yield json.dumps({"id": item_id, "summary": summary}) + "\n"
+
+
+# Bulk endpoint: send a JSON array, or NDJSON with Content-Type application/x-ndjson,
+# and read back one NDJSON line per dialogue as each batch completes
+@app.post("/summarize/batch")
+async def summarize_batch_endpoint(request: Request):
+    require_model()
+    try:
+        items = parse_batch_body(await request.body(), "ndjson" in request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} dialogues per request")
+
+    # Shed load before the response starts, like /summarize/
+    texts, keys, summaries = await lookup_chunk(items[:MAX_BATCH_SIZE])
+    try:
+        call = await queue_misses(texts, summaries)
+    except asyncio.QueueFull:
+        raise busy_error()
+    return StreamingResponse(summarize_items(items, (texts, keys, summaries, call)),
+                             media_type="application/x-ndjson")
+
+
+# Per-stage timings of long-input requests (most recent requests)
+long_input_timings = deque(maxlen=1000)
+
+
+# Long-input endpoint: dialogues past the model input limit are summarized window by window
+@app.post("/summarize/long/")
+async def summarize_long_input(dialogue_input: DialogueInput):
+    require_model()
+    text = clean_text(dialogue_input.dialogue)
+    key = cache_key(text, mode="long")
+    summary = await summary_cache.get(key)
+    if summary is not None:
+        return {"summary": summary}
+
+    # One queue slot for the whole map-reduce, shed like any other request when the queue is full
+    try:
+        summary, timings = await batcher.submit_call(summarize_long, text)
+    except asyncio.QueueFull:
+        raise busy_error()
+    long_input_timings.append(timings)
+    await summary_cache.put(key, summary)
+    return {"summary": summary, "timings": timings}
+
+
+def average_timings(timings) -> dict:
+    if not timings:
+        return {"count": 0}
+    return {"count": len(timings), **{name: sum(t[name] for t in timings) / len(timings) for name in timings[0]}}
+
+
+# Time to first token of streamed summaries (most recent requests)
+first_token_latencies = deque(maxlen=1000)
+
+
+def latency_summary(latencies) -> dict:
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": values[len(values) // 2] * 1000,
+        "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))] * 1000,
+    }
+
+
+# Ends generate() at the next token once the flag is set, e.g. when the client has gone away
+def stop_when_set(stopped: threading.Event):
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class StopWhenSet(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), stopped.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([StopWhenSet()])
+
+
+# Streamer that hands decoded text to the event loop through an asyncio.Queue, so the
+# response waits on the queue instead of holding a thread per stream. None ends the stream.
+def queue_streamer(tokenizer, loop: asyncio.AbstractEventLoop):
+    from transformers import TextStreamer
+
+    class QueueStreamer(TextStreamer):
+        def __init__(self):
+            super().__init__(tokenizer, skip_special_tokens=True)
+            self.queue = asyncio.Queue()
+
+        def on_finalized_text(self, text: str, stream_end: bool = False):
+            loop.call_soon_threadsafe(self.queue.put_nowait, text)
+            if stream_end:
+                loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    return QueueStreamer()
+
+
+# Runs on the inference pool, feeding decoded text to the streamer as it is generated
+def generate_streaming(text: str, sampling: bool, streamer, stopped: threading.Event):
+    inputs = registry.tokenizer(text, return_tensors="pt", truncation=True, max_length=MAX_INPUT_LENGTH)
+    inputs = {key: value.to(registry.device) for key, value in inputs.items()}
+    params = {**STREAM_GENERATION_PARAMS, **(SAMPLING_PARAMS if sampling else {})}
+    registry.model.generate(**inputs, streamer=streamer, stopping_criteria=stop_when_set(stopped), **params)
+
+
+async def stream_summary(streamer, generation: asyncio.Future, stopped: threading.Event):
+    start = time.perf_counter()
+    summary = ""
+    try:
+        while True:
+            chunk = await streamer.queue.get()
+            if chunk is None:
+                break
+            if not chunk:
+                continue
+            if not summary:
+                first_token_latencies.append(time.perf_counter() - start)
+            summary += chunk
+            yield f"data: {json.dumps({'text': chunk})}\n\n"
+        try:
+            await generation
+        except Exception:
+            logger.exception("Streaming summary failed")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Summarization failed'})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'summary': summary})}\n\n"
+    finally:
+        # Client disconnected (or we are done): drop the call if it is still queued,
+        # otherwise stop generating at the next token and free the worker
+        stopped.set()
+        generation.cancel()
+
+
+# Streaming endpoint: sends partial summary text as server-sent events while it is decoded
+@app.post("/summarize/stream")
+async def summarize_stream(dialogue_input: StreamDialogueInput):
+    require_model()
+    text = clean_text(dialogue_input.dialogue)
+    streamer = queue_streamer(registry.tokenizer, asyncio.get_running_loop())
+    stopped = threading.Event()
+    try:
+        generation = await batcher.enqueue_call(generate_streaming, text, dialogue_input.sampling, streamer, stopped)
+    except asyncio.QueueFull:
+        raise busy_error()
+
+    # A failed or dropped call never ends the stream itself; end it so the reader finishes
+    def end_stream(future):
+        if future.cancelled() or future.exception() is not None:
+            streamer.queue.put_nowait(None)
+
+    generation.add_done_callback(end_stream)
+    return StreamingResponse(stream_summary(streamer, generation, stopped), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+# Drop cached summaries, e.g. after changing how summaries are post-processed
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    # The version stays that of the loaded model; new model files take over (and
+    # clear the cache) when they are loaded on the next start
+    await asyncio.to_thread(summary_cache.invalidate)
+    return {"status": "invalidated"}
+
+
+# Liveness: the process is up and serving requests, whatever the model state
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+# Readiness: only ready once the model is loaded and warmed up
+@app.get("/health/ready")
+async def readiness():
+    status = registry.status()
+    return JSONResponse(status, status_code=200 if registry.ready else 503)
+
+
+# Achieved batch sizes and cache counters
+@app.get("/metrics")
+async def metrics():
+    return {
+        "model": registry.status(),
+        "batching": batcher.metrics(),
+        "cache": summary_cache.metrics(),
+        "stream_time_to_first_token": latency_summary(first_token_latencies),
+        "long_input": average_timings(long_input_timings),
+    }
+
+
 # HTML UI
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
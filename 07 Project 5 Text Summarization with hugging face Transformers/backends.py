@@ -0,0 +1,44 @@
+# Model backends for the summarizer. All of them expose the transformers `generate` API.
+#   torch      - the fine-tuned T5 model as saved by the notebook (fp32, GPU if available)
+#   quantized  - the same model with Linear layers dynamically quantized to int8 (CPU)
+#   onnx       - ONNX Runtime encoder/decoder with cached KV (CPU), needs `pip install optimum[onnxruntime]`
+import os
+
+import torch
+from transformers import T5ForConditionalGeneration
+
+BACKENDS = ("torch", "quantized", "onnx")
+
+
+def load_torch(model_dir: str):
+    model = T5ForConditionalGeneration.from_pretrained(model_dir)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return model.to(device).eval()
+
+
+def load_quantized(model_dir: str):
+    model = T5ForConditionalGeneration.from_pretrained(model_dir).eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_onnx(model_dir: str, onnx_dir: str = None):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    # Export once and reuse the exported graphs on later startups
+    onnx_dir = onnx_dir or model_dir.rstrip("/") + "_onnx"
+    if os.path.isdir(onnx_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(onnx_dir, use_cache=True, provider="CPUExecutionProvider")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_dir, export=True, use_cache=True,
+                                                 provider="CPUExecutionProvider")
+    model.save_pretrained(onnx_dir)
+    return model
+
+
+def load_model(backend: str, model_dir: str):
+    if backend == "torch":
+        return load_torch(model_dir)
+    if backend == "quantized":
+        return load_quantized(model_dir)
+    if backend == "onnx":
+        return load_onnx(model_dir)
+    raise ValueError(f"Unknown summarizer backend {backend!r}, expected one of {', '.join(BACKENDS)}")
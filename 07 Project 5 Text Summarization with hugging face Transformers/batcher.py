@@ -0,0 +1,167 @@
+import asyncio
+from collections import Counter
+
+
+class BatcherStopped(RuntimeError):
+    pass
+
+
+# A function queued to run on its own rather than as part of a batch
+class Call:
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+
+
+# Collects concurrent requests for a short window and runs them as one batch.
+# Batches run on the given executor so the event loop is never blocked, and
+# the waiting queue is bounded so callers can shed load when it fills up.
+# Work that cannot be batched can be queued as a call: it waits in the same
+# queue, against the same bound, and runs alone on the next free worker.
+class MicroBatcher:
+    def __init__(self, run_batch, max_batch_size: int = 8, batch_window_ms: float = 10,
+                 executor=None, workers: int = 1, max_queue_size: int = 0):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.batch_window_ms = batch_window_ms
+        self.executor = executor
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.queue = None
+        self.tasks = []
+
+        # Metrics
+        self.batch_sizes = Counter()
+        self.total_batches = 0
+        self.total_items = 0
+        self.total_calls = 0
+        self.rejected = 0
+
+    async def start(self):
+        if not self.tasks:
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        for task in self.tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.tasks = []
+        # Fail whatever is still waiting so no caller hangs on a batcher that is gone
+        while self.queue is not None and not self.queue.empty():
+            self._fail([self.queue.get_nowait()])
+
+    # Raises asyncio.QueueFull when the queue is at capacity
+    async def submit(self, item):
+        return await (await self._enqueue(item))
+
+    # Queues function(*args) and returns its future without waiting for it; cancel the
+    # future to drop the call if it has not started yet. Raises asyncio.QueueFull.
+    async def enqueue_call(self, function, *args) -> asyncio.Future:
+        return await self._enqueue(Call(function, args))
+
+    async def submit_call(self, function, *args):
+        return await (await self.enqueue_call(function, *args))
+
+    async def _enqueue(self, item) -> asyncio.Future:
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        return future
+
+    async def _collect(self, batch):
+        # Keep filling the batch until the window closes; a call ends the batch early
+        # and is handed back to run next
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if isinstance(entry[0], Call):
+                return entry
+            batch.append(entry)
+        return None
+
+    async def _run(self):
+        held = None
+        batch = []
+        try:
+            while True:
+                # Block for the first item, or take the call that ended the previous batch
+                batch = [held or await self.queue.get()]
+                held = None
+                if isinstance(batch[0][0], Call):
+                    await self._run_call(*batch[0])
+                else:
+                    held = await self._collect(batch)
+                    await self._run_batch(batch)
+        except asyncio.CancelledError:
+            # Stopped: the callers of the running batch get the same error as queued ones
+            self._fail(batch + ([held] if held else []))
+            raise
+
+    async def _run_batch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.run_batch, items)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        self._record(len(batch))
+
+    async def _run_call(self, call, future):
+        # The caller gave up while the call was queued
+        if future.done():
+            return
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, call.function, *call.args)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(result)
+        self.total_calls += 1
+
+    def _fail(self, batch):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(BatcherStopped("Batcher stopped"))
+
+    def _record(self, size: int):
+        self.batch_sizes[size] += 1
+        self.total_batches += 1
+        self.total_items += size
+
+    def metrics(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "batch_window_ms": self.batch_window_ms,
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "rejected_requests": self.rejected,
+            "total_batches": self.total_batches,
+            "total_requests": self.total_items,
+            "total_calls": self.total_calls,
+            "avg_batch_size": self.total_items / self.total_batches if self.total_batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+        }
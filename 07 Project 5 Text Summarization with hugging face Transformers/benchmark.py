@@ -0,0 +1,63 @@
+# Benchmark summarize_batch across input lengths
+# Usage: python benchmark.py --lengths 16 64 256 512 --batch-size 8 --runs 10
+import argparse
+import time
+
+from app import clean_text, registry, summarize_batch, MAX_INPUT_LENGTH
+
+SAMPLE_TURNS = [
+    "Amanda: I baked cookies. Do you want some?",
+    "Jerry: Sure! What kind are they?",
+    "Amanda: Chocolate chip, I'll bring you some tomorrow.",
+    "Jerry: Great, thanks a lot!",
+]
+
+
+# Build a dialogue of roughly the requested number of tokens
+def make_dialogue(num_tokens: int) -> str:
+    turns = []
+    while len(registry.tokenizer("\n".join(turns))["input_ids"]) < num_tokens:
+        turns.append(SAMPLE_TURNS[len(turns) % len(SAMPLE_TURNS)])
+    return "\n".join(turns)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def run(length: int, batch_size: int, runs: int) -> dict:
+    dialogues = [clean_text(make_dialogue(length))] * batch_size
+    tokens = sum(min(len(ids), MAX_INPUT_LENGTH) for ids in registry.tokenizer(dialogues)["input_ids"])
+
+    summarize_batch(dialogues)  # warm-up
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        summarize_batch(dialogues)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "length": length,
+        "tokens_per_sec": tokens * runs / sum(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarization throughput and latency by input length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[16, 32, 64, 128, 256, 512])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    registry.load()
+    if not registry.ready:
+        raise SystemExit(f"Could not load model: {registry.error}")
+
+    print(f"{'tokens':>8} {'tokens/sec':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    for length in args.lengths:
+        result = run(length, args.batch_size, args.runs)
+        print(f"{result['length']:>8} {result['tokens_per_sec']:>12.1f} {result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f}")
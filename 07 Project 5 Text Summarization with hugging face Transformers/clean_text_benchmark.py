@@ -0,0 +1,36 @@
+# Micro-benchmark: clean_text throughput (MB/s) against the original three-pass version
+# Usage: python clean_text_benchmark.py
+import re
+import time
+
+from app import clean_text
+
+SAMPLE = "Violet: Hey Claire! Here, let me share the link: <file_other>\r\nClaire:  Oh wow,\tthanks!\n"
+SIZES = {"small (1 dialogue)": 1, "medium (100 dialogues)": 100, "large (~4 MB)": 50000}
+
+
+def original_clean_text(text: str) -> str:
+    text = re.sub(r'\r\n', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'<.*?>', '', text)
+    text = text.strip().lower()
+    return text
+
+
+def throughput(function, text: str, min_seconds: float = 0.5) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        function(text)
+        runs += 1
+    return len(text.encode()) * runs / (time.perf_counter() - start) / 1e6
+
+
+if __name__ == "__main__":
+    print(f"{'input':>24} {'original MB/s':>14} {'clean_text MB/s':>16} {'speedup':>8}")
+    for label, repeat in SIZES.items():
+        text = SAMPLE * repeat
+        assert clean_text(text) == original_clean_text(text)
+        before = throughput(original_clean_text, text)
+        after = throughput(clean_text, text)
+        print(f"{label:>24} {before:>14.1f} {after:>16.1f} {after / before:>7.2f}x")
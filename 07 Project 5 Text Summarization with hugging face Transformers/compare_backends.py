@@ -0,0 +1,62 @@
+# Compare summarizer backends on a held-out dialogue set: ROUGE vs latency
+# pip install evaluate rouge_score pandas
+# Usage: python compare_backends.py samsum-validation.csv --backends torch quantized onnx --limit 200
+import argparse
+import time
+
+import evaluate
+import pandas as pd
+from transformers import T5Tokenizer
+
+from app import clean_text, GENERATION_PARAMS, MAX_INPUT_LENGTH, MODEL_DIR
+from backends import BACKENDS, load_model
+
+
+def summarize_all(model, tokenizer, dialogues: list[str], batch_size: int) -> tuple[list[str], float]:
+    summaries = []
+    start = time.perf_counter()
+    for i in range(0, len(dialogues), batch_size):
+        batch = dialogues[i:i + batch_size]
+        inputs = tokenizer(batch, return_tensors="pt", truncation=True, padding="longest", max_length=MAX_INPUT_LENGTH)
+        inputs = {key: value.to(model.device) for key, value in inputs.items()}
+        outputs = model.generate(**inputs, **GENERATION_PARAMS)
+        summaries.extend(tokenizer.batch_decode(outputs, skip_special_tokens=True))
+    return summaries, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ROUGE and latency of each summarizer backend")
+    parser.add_argument("dataset", help="CSV with 'dialogue' and 'summary' columns, e.g. samsum-validation.csv")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.dataset).dropna(subset=["dialogue", "summary"]).head(args.limit)
+    dialogues = [clean_text(text) for text in data["dialogue"]]
+    references = [clean_text(text) for text in data["summary"]]
+
+    tokenizer = T5Tokenizer.from_pretrained(MODEL_DIR)
+    rouge = evaluate.load("rouge")
+
+    results = {}
+    for backend in args.backends:
+        model = load_model(backend, MODEL_DIR)
+        summarize_all(model, tokenizer, dialogues[:args.batch_size], args.batch_size)  # warm-up
+        predictions, elapsed = summarize_all(model, tokenizer, dialogues, args.batch_size)
+        scores = rouge.compute(predictions=predictions, references=references)
+        results[backend] = {"ms_per_dialogue": elapsed / len(dialogues) * 1000, **scores}
+        del model
+
+    # Report every backend relative to the first one
+    baseline_name = args.backends[0]
+    baseline = results[baseline_name]
+    print(f"baseline: {baseline_name}")
+    print(f"{'backend':>10} {'ms/dialogue':>12} {'speedup':>8} {'rouge1':>8} {'rouge2':>8} {'rougeL':>8} "
+          f"{'d_rouge1':>9} {'d_rouge2':>9} {'d_rougeL':>9}")
+    for backend, result in results.items():
+        speedup = baseline["ms_per_dialogue"] / result["ms_per_dialogue"]
+        print(f"{backend:>10} {result['ms_per_dialogue']:>12.1f} {speedup:>7.2f}x "
+              f"{result['rouge1']:>8.4f} {result['rouge2']:>8.4f} {result['rougeL']:>8.4f} "
+              f"{result['rouge1'] - baseline['rouge1']:>+9.4f} {result['rouge2'] - baseline['rouge2']:>+9.4f} "
+              f"{result['rougeL'] - baseline['rougeL']:>+9.4f}")
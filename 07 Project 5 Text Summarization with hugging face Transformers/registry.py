@@ -0,0 +1,74 @@
+import hashlib
+import os
+import threading
+import time
+
+
+# Fingerprint of the saved model: changes whenever any file in the directory is replaced
+def model_fingerprint(model_dir: str) -> str:
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(model_dir)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(f"{os.path.relpath(path, model_dir)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+# Holds the model and tokenizer once they are loaded. Loading happens in the
+# background after startup, so importing the app stays cheap and the process
+# can answer liveness checks while the weights are still being read.
+class ModelRegistry:
+    def __init__(self, backend: str, model_dir: str):
+        self.backend = backend
+        self.model_dir = model_dir
+        self.model = None
+        self.tokenizer = None
+        self.device = None
+        self.state = "not_loaded"  # not_loaded -> loading -> warming_up -> ready | failed
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.fingerprint = None  # of the files the loaded model was read from
+        self.done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def load(self, warmup=None):
+        try:
+            self.state = "loading"
+            start = time.perf_counter()
+            # Taken before reading the weights, so files replaced later show up as a new fingerprint
+            self.fingerprint = model_fingerprint(self.model_dir)
+            # Heavy imports are deferred to here so importing the app does not pay for them
+            from transformers import T5Tokenizer
+            from backends import load_model
+
+            self.model = load_model(self.backend, self.model_dir)
+            self.tokenizer = T5Tokenizer.from_pretrained(self.model_dir)
+            self.device = self.model.device
+            self.load_seconds = time.perf_counter() - start
+
+            if warmup is not None:
+                self.state = "warming_up"
+                start = time.perf_counter()
+                warmup()
+                self.warmup_seconds = time.perf_counter() - start
+            self.state = "ready"
+        except Exception as exc:
+            self.state = "failed"
+            self.error = repr(exc)
+        finally:
+            self.done.set()
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "backend": self.backend,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+            "fingerprint": self.fingerprint,
+        }
@@ -0,0 +1,44 @@
+# Measure how long `import app` takes and how long until the app reports ready
+# Usage: python startup_benchmark.py --runs 5
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+
+
+# Each import runs in a fresh interpreter so module caching does not hide the cost
+def import_seconds() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def ready_seconds(timeout: float) -> tuple[float, dict]:
+    from fastapi.testclient import TestClient
+    import app
+
+    start = time.perf_counter()
+    with TestClient(app.app) as client:
+        while time.perf_counter() - start < timeout:
+            response = client.get("/health/ready")
+            if response.status_code == 200 or response.json()["state"] == "failed":
+                return time.perf_counter() - start, response.json()
+            time.sleep(0.05)
+    raise SystemExit(f"App was not ready after {timeout} seconds")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time and time-to-ready of the summarization app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    imports = [import_seconds() for _ in range(args.runs)]
+    print(f"import app: median {statistics.median(imports) * 1000:.1f} ms, "
+          f"min {min(imports) * 1000:.1f} ms, max {max(imports) * 1000:.1f} ms")
+
+    elapsed, status = ready_seconds(args.timeout)
+    print(f"startup to ready: {elapsed:.2f} s (state={status['state']}, load={status['load_seconds']}, "
+          f"warm-up={status['warmup_seconds']})")
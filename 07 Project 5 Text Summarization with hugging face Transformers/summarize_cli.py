@@ -0,0 +1,86 @@
+# Summarize a local file of dialogues offline, using the same batched path as /summarize/batch
+# Input: NDJSON (one dialogue string or {"id": ..., "dialogue": ...} per line) or a JSON array
+# Usage: python summarize_cli.py dialogues.ndjson summaries.ndjson --workers 4
+# Re-running the same command after an interruption resumes from the last checkpoint.
+import argparse
+import json
+import multiprocessing
+import os
+
+import app
+
+
+# Each worker process loads the model once and gets its share of the CPU threads.
+# An initializer must not raise (the pool would just start a new worker, forever),
+# so a failed load is reported by the first task instead and ends the run.
+def init_worker(threads: int):
+    app.registry.load()
+    if app.registry.ready:
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def summarize_chunk(chunk: list[tuple]) -> list[str]:
+    if not app.registry.ready:
+        raise RuntimeError(f"Could not load model: {app.registry.error}")
+    summaries = app.summarize_batch([app.clean_text(dialogue) for _, dialogue in chunk])
+    return [json.dumps({"id": item_id, "summary": summary}) + "\n" for (item_id, _), summary in zip(chunk, summaries)]
+
+
+def read_items(path: str) -> list[tuple]:
+    with open(path, "rb") as file:
+        body = file.read()
+    return app.parse_batch_body(body, ndjson=not body.lstrip().startswith(b"["))
+
+
+# The checkpoint records how many items are done and how many bytes of output belong to them
+def read_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"done": 0, "offset": 0}
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_checkpoint(path: str, done: int, offset: int):
+    with open(path + ".tmp", "w") as file:
+        json.dump({"done": done, "offset": offset}, file)
+    os.replace(path + ".tmp", path)
+
+
+def run(input_path: str, output_path: str, workers: int, batch_size: int):
+    items = read_items(input_path)
+    checkpoint_path = output_path + ".checkpoint"
+    checkpoint = read_checkpoint(checkpoint_path)
+    done = checkpoint["done"]
+    chunks = [items[start:start + batch_size] for start in range(done, len(items), batch_size)]
+    print(f"{len(items)} dialogues, {done} already done, {len(chunks)} batches to go")
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with open(output_path, "a+b") as output, \
+            multiprocessing.Pool(workers, initializer=init_worker, initargs=(threads,)) as pool:
+        # Drop anything written after the last checkpoint
+        output.truncate(checkpoint["offset"])
+        output.seek(checkpoint["offset"])
+
+        # imap keeps results in input order while the workers run ahead
+        for lines in pool.imap(summarize_chunk, chunks):
+            output.write("".join(lines).encode())
+            output.flush()
+            os.fsync(output.fileno())
+            done += len(lines)
+            write_checkpoint(checkpoint_path, done, output.tell())
+            print(f"{done}/{len(items)}")
+
+    os.remove(checkpoint_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a file of dialogues into NDJSON")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument("--batch-size", type=int, default=app.MAX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    run(args.input, args.output, args.workers, args.batch_size)
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# Content-addressed cache of summaries: in-memory LRU bounded by bytes,
+# optionally backed by an SQLite file that survives restarts. Disk reads run
+# in a worker thread and disk writes are buffered and committed in batches,
+# so the event loop never waits on SQLite or fsync.
+class SummaryCache:
+    def __init__(self, max_bytes: int, model_version: str = None, disk_path: str = None,
+                 flush_seconds: float = 1.0):
+        self.max_bytes = max_bytes
+        self.model_version = model_version
+        self.flush_seconds = flush_seconds
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.pending = {}  # written to memory, not yet committed to disk
+        self.flush_task = None
+        # Always take db_lock before lock: db_lock serializes SQLite, lock guards the dicts
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_flushes = 0
+
+        self.db = None
+        if disk_path:
+            self.db = sqlite3.connect(disk_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if model_version is not None:
+            self.set_model_version(model_version)
+
+    # Tie the cache to the model that produces its summaries; entries written
+    # under any other version, in memory or on disk, are dropped
+    def set_model_version(self, model_version: str):
+        stored = self.model_version
+        if self.db is not None:
+            with self.db_lock:
+                row = self.db.execute("SELECT value FROM meta WHERE name = 'model_version'").fetchone()
+            stored = row[0] if row is not None else None
+        if stored != model_version:
+            self.invalidate(model_version)
+        self.model_version = model_version
+
+    @staticmethod
+    def make_key(text: str, params: dict) -> str:
+        payload = json.dumps({"text": text, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str):
+        with self.lock:
+            summary = self.entries.get(key)
+            if summary is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return summary
+            summary = self.pending.get(key)
+
+        if summary is None and self.db is not None:
+            summary = await asyncio.to_thread(self._read_disk, key)
+        if summary is not None:
+            self.disk_hits += 1
+            self._put_memory(key, summary)
+            return summary
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, summary: str):
+        self._put_memory(key, summary)
+        if self.db is not None:
+            with self.lock:
+                self.pending[key] = summary
+            if self.flush_task is None:
+                self.flush_task = asyncio.create_task(self._flush_later())
+
+    # Commit everything written so far, e.g. on shutdown
+    async def flush(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if self.db is not None:
+            await asyncio.to_thread(self._flush)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_seconds)
+        self.flush_task = None
+        await asyncio.to_thread(self._flush)
+
+    def _read_disk(self, key: str):
+        with self.db_lock:
+            row = self.db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    # One transaction (and one fsync) for all summaries written since the last flush
+    def _flush(self):
+        with self.db_lock:
+            with self.lock:
+                rows = list(self.pending.items())
+                self.pending.clear()
+            if rows:
+                self.db.executemany("INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", rows)
+                self.db.commit()
+                self.disk_flushes += 1
+
+    def _put_memory(self, key: str, summary: str):
+        size = len(key) + len(summary.encode())
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= len(key) + len(self.entries.pop(key).encode())
+            self.entries[key] = summary
+            self.current_bytes += size
+            # Evict least recently used entries until we are back under budget
+            while self.current_bytes > self.max_bytes:
+                old_key, old_summary = self.entries.popitem(last=False)
+                self.current_bytes -= len(old_key) + len(old_summary.encode())
+
+    # Drop every cached summary; with a version, also record it as the current model
+    def invalidate(self, model_version: str = None):
+        if model_version is not None:
+            self.model_version = model_version
+        with self.db_lock:
+            with self.lock:
+                self.entries.clear()
+                self.pending.clear()
+                self.current_bytes = 0
+            if self.db is not None:
+                self.db.execute("DELETE FROM summaries")
+                self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('model_version', ?)",
+                                (self.model_version,))
+                self.db.commit()
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_tier": self.db is not None,
+            "disk_pending": len(self.pending),
+            "disk_flushes": self.disk_flushes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "model_version": self.model_version,
+        }
@@ -0,0 +1,28 @@
+"""Add owner indexes to todos
+
+Revision ID: 5f3b9c1d7e42
+Revises: ca2a96486e90
+Create Date: 2026-10-18 10:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9c1d7e42'
+down_revision: Union[str, None] = 'ca2a96486e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_todos_owner_id_id", "todos", ["owner_id", "id"])
+    op.create_index("ix_todos_owner_id_complete_priority", "todos", ["owner_id", "complete", "priority"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_todos_owner_id_complete_priority", table_name="todos")
+    op.drop_index("ix_todos_owner_id_id", table_name="todos")
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..",
+                                "07 Project 5 Text Summarization with hugging face Transformers"))
+
+import pytest
+
+from batcher import BatcherStopped, MicroBatcher
+
+
+class RunBatch:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise ValueError("model failed")
+        return [item.upper() for item in items]
+
+
+def test_requests_in_one_window_share_a_batch():
+    async def run():
+        run_batch = RunBatch()
+        batcher = MicroBatcher(run_batch, max_batch_size=8, batch_window_ms=50)
+        results = await asyncio.gather(*[batcher.submit(text) for text in ["a", "b", "c"]])
+        await batcher.stop()
+        assert results == ["A", "B", "C"]
+        assert run_batch.batches == [["a", "b", "c"]]
+
+    asyncio.run(run())
+
+
+def test_batches_are_split_at_max_size():
+    async def run():
+        run_batch = RunBatch()
+        batcher = MicroBatcher(run_batch, max_batch_size=2, batch_window_ms=50)
+        results = await asyncio.gather(*[batcher.submit(text) for text in "abcde"])
+        await batcher.stop()
+        assert results == list("ABCDE")
+        assert [len(batch) for batch in run_batch.batches] == [2, 2, 1]
+        assert batcher.metrics()["batch_size_histogram"] == {1: 1, 2: 2}
+
+    asyncio.run(run())
+
+
+def test_full_queue_rejects_new_requests():
+    async def run():
+        run_batch = RunBatch()
+        run_batch.release.clear()
+        batcher = MicroBatcher(run_batch, max_batch_size=1, batch_window_ms=0, max_queue_size=1)
+        running = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.to_thread(run_batch.started.wait, 5)
+        queued = asyncio.ensure_future(batcher.submit("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.QueueFull):
+            await batcher.submit("c")
+        run_batch.release.set()
+        assert await asyncio.gather(running, queued) == ["A", "B"]
+        assert batcher.rejected == 1
+        await batcher.stop()
+
+    asyncio.run(run())
+
+
+def test_batch_error_reaches_every_caller():
+    async def run():
+        batcher = MicroBatcher(RunBatch(fail=True), max_batch_size=8, batch_window_ms=50)
+        results = await asyncio.gather(*[batcher.submit(text) for text in "abc"], return_exceptions=True)
+        await batcher.stop()
+        assert len(results) == 3
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_stop_fails_running_and_queued_requests():
+    async def run():
+        run_batch = RunBatch()
+        run_batch.release.clear()
+        batcher = MicroBatcher(run_batch, max_batch_size=1, batch_window_ms=0, max_queue_size=4)
+        running = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.to_thread(run_batch.started.wait, 5)
+        queued = [asyncio.ensure_future(batcher.submit(text)) for text in "bc"]
+        await asyncio.sleep(0)
+        await batcher.stop()
+        run_batch.release.set()
+        for future in [running, *queued]:
+            with pytest.raises(BatcherStopped):
+                await future
+
+    asyncio.run(run())
+
+
+def test_calls_share_the_queue_bound_and_run_alone():
+    async def run():
+        run_batch = RunBatch()
+        run_batch.release.clear()
+        batcher = MicroBatcher(run_batch, max_batch_size=8, batch_window_ms=50, max_queue_size=2)
+        running = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.to_thread(run_batch.started.wait, 5)
+        dropped = await batcher.enqueue_call(str.upper, "dropped")
+        call = await batcher.enqueue_call(str.upper, "call")
+        with pytest.raises(asyncio.QueueFull):
+            await batcher.submit("b")
+        # A call cancelled while it waits is never run
+        dropped.cancel()
+        run_batch.release.set()
+        assert await running == "A"
+        assert await call == "CALL"
+        assert batcher.total_calls == 1
+        assert run_batch.batches == [["a"]]
+        await batcher.stop()
+
+    asyncio.run(run())
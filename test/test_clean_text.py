@@ -0,0 +1,48 @@
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "07 Project 5 Text Summarization with hugging face Transformers"))
+
+from app import clean_text
+
+
+# The original three-pass implementation, kept as the reference for the output semantics
+def reference_clean_text(text: str) -> str:
+    text = re.sub(r'\r\n', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'<.*?>', '', text)
+    text = text.strip().lower()
+    return text
+
+
+GOLDEN = [
+    ("", ""),
+    ("   ", ""),
+    ("Hello World", "hello world"),
+    ("Amanda: Hi!\r\nJerry: Hey\r\n", "amanda: hi! jerry: hey"),
+    ("a\t\t b\n\n\nc", "a b c"),
+    ("look <file_photo> here", "look  here"),
+    ("<b>Bold</b> move", "bold move"),
+    ("<a\nhref='x'>link</a>", "link"),
+    ("x < y and y > z", "x  z"),
+    ("unclosed <tag here", "unclosed <tag here"),
+    ("<<nested>> tags", "> tags"),
+    (" non breaking ", "non breaking"),
+    ("ÄÖÜ Straße", "äöü straße"),
+]
+
+
+def test_golden_outputs():
+    for text, expected in GOLDEN:
+        assert clean_text(text) == expected, text
+        assert reference_clean_text(text) == expected, text
+
+
+def test_matches_reference_on_random_inputs():
+    alphabet = ["a", "B", " ", "  ", "\n", "\r\n", "\r", "\t", " ", "<", ">", "<br>", "x y", "İ"]
+    rng = random.Random(42)
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert clean_text(text) == reference_clean_text(text), repr(text)
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..",
+                                "07 Project 5 Text Summarization with hugging face Transformers"))
+
+from summary_cache import SummaryCache
+
+
+def entry_size(key, summary):
+    return len(key) + len(summary.encode())
+
+
+def test_memory_tier_evicts_least_recently_used_past_the_byte_budget():
+    async def run():
+        cache = SummaryCache(max_bytes=2 * entry_size("k1", "summary"), model_version="v1")
+        await cache.put("k1", "summary")
+        await cache.put("k2", "summary")
+        assert await cache.get("k1") == "summary"  # k1 is now the most recently used
+        await cache.put("k3", "summary")
+        assert await cache.get("k2") is None
+        assert await cache.get("k1") == "summary"
+        assert await cache.get("k3") == "summary"
+        assert cache.current_bytes <= cache.max_bytes
+        # An entry larger than the whole budget is never kept
+        await cache.put("big", "x" * cache.max_bytes)
+        assert await cache.get("big") is None
+
+    asyncio.run(run())
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "summaries.db")
+
+    async def write():
+        cache = SummaryCache(max_bytes=1024, model_version="v1", disk_path=path, flush_seconds=60)
+        await cache.put("k1", "first")
+        await cache.put("k2", "second")
+        # Not committed yet, but still served from the write buffer
+        assert cache.metrics()["disk_pending"] == 2
+        await cache.flush()
+        assert cache.metrics()["disk_flushes"] == 1
+
+    async def read():
+        cache = SummaryCache(max_bytes=1024, model_version="v1", disk_path=path)
+        assert await cache.get("k1") == "first"
+        assert await cache.get("k1") == "first"
+        assert (cache.hits, cache.disk_hits, cache.misses) == (1, 1, 0)
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_new_model_version_drops_disk_entries(tmp_path):
+    path = str(tmp_path / "summaries.db")
+
+    async def run():
+        cache = SummaryCache(max_bytes=1024, model_version="v1", disk_path=path)
+        await cache.put("k1", "old summary")
+        await cache.flush()
+
+        restarted = SummaryCache(max_bytes=1024, model_version="v2", disk_path=path)
+        assert await restarted.get("k1") is None
+
+        # Invalidating a running cache also clears entries not yet flushed
+        await restarted.put("k2", "new summary")
+        restarted.invalidate("v3")
+        await restarted.flush()
+        assert await restarted.get("k2") is None
+        assert restarted.metrics()["model_version"] == "v3"
+
+    asyncio.run(run())
+
+
+def test_clearing_keeps_the_loaded_model_version(tmp_path):
+    path = str(tmp_path / "summaries.db")
+
+    async def run():
+        # The cache learns its version once the model is loaded
+        cache = SummaryCache(max_bytes=1024, disk_path=path)
+        cache.set_model_version("v1")
+        await cache.put("k1", "old summary")
+        cache.invalidate()
+        await cache.put("k2", "still from v1")
+        await cache.flush()
+        assert await cache.get("k1") is None
+
+        # Summaries written after clearing still belong to v1, so new weights drop them
+        restarted = SummaryCache(max_bytes=1024, disk_path=path)
+        restarted.set_model_version("v2")
+        assert await restarted.get("k2") is None
+
+    asyncio.run(run())
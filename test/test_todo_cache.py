@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "05_Project_3_TodoApp"))
+
+import fakeredis
+import pytest
+
+from todo_cache import MemoryBackend, RedisBackend, TodoListCache
+
+
+def memory_cache():
+    return TodoListCache(MemoryBackend(100), ttl=60)
+
+
+def redis_cache():
+    return TodoListCache(RedisBackend(fakeredis.FakeAsyncRedis()), ttl=60)
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"page {self.calls}".encode()
+
+
+@pytest.mark.parametrize("make_cache", [memory_cache, redis_cache])
+def test_hit_after_miss_and_invalidate(make_cache):
+    async def run():
+        cache, loader = make_cache(), Loader()
+        assert await cache.get_or_load(1, "50:None", loader) == b"page 1"
+        assert await cache.get_or_load(1, "50:None", loader) == b"page 1"
+        # Other owners and other pages have their own entries
+        assert await cache.get_or_load(2, "50:None", loader) == b"page 2"
+        await cache.invalidate(1)
+        assert await cache.get_or_load(1, "50:None", loader) == b"page 3"
+        assert await cache.get_or_load(2, "50:None", loader) == b"page 2"
+        assert (cache.hits, cache.misses, loader.calls) == (2, 3, 3)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("make_cache", [memory_cache, redis_cache])
+def test_concurrent_misses_share_one_load(make_cache):
+    async def run():
+        cache, loader = make_cache(), Loader(delay=0.05)
+        pages = await asyncio.gather(*[cache.get_or_load(1, "50:None", loader) for _ in range(20)])
+        assert set(pages) == {b"page 1"}
+        assert loader.calls == 1
+
+    asyncio.run(run())
+
+
+def test_workers_sharing_redis_wait_for_the_lock_holder():
+    async def run():
+        redis = fakeredis.FakeAsyncRedis()
+        # Two caches on one Redis stand in for two worker processes
+        first, second = TodoListCache(RedisBackend(redis), ttl=60), TodoListCache(RedisBackend(redis), ttl=60)
+        loader = Loader(delay=0.1)
+        pages = await asyncio.gather(first.get_or_load(1, "50:None", loader),
+                                     second.get_or_load(1, "50:None", loader))
+        assert pages == [b"page 1", b"page 1"]
+        assert loader.calls == 1
+
+    asyncio.run(run())
+
+
+def test_failed_load_is_not_cached():
+    async def run():
+        cache = memory_cache()
+
+        async def failing():
+            raise RuntimeError("database down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(1, "50:None", failing)
+        assert await cache.get_or_load(1, "50:None", Loader()) == b"page 1"
+
+    asyncio.run(run())
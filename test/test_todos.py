@@ -1,27 +1,171 @@
-from lib2to3.pytree import Base
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
 
-from  sqlalchemy import  create_engine
-from sqlalchemy.orm import sessionmaker
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "05_Project_3_TodoApp"))
+
+from  sqlalchemy.ext.asyncio import  AsyncSession, async_sessionmaker, create_async_engine
 from  sqlalchemy.pool import  StaticPool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
+from DataBase import Base, get_db
+from Models import Todos
+from mainapi import app
+
+# In memory: StaticPool keeps the one connection (and so the database) for the whole run
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite://"
 
-engine = create_engine(
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL ,
-    connect_args= {"Check_same_thread" : False},
+    connect_args= {"check_same_thread" : False},
     poolclass= StaticPool,
 
 )
 
-TestingSessionLocal = sessionmaker(autocommit = False , autoflush  = False , bind = engine)
-Base.metadata.create_all(bind =  engine)
+TestingSessionLocal = async_sessionmaker(engine , class_ = AsyncSession , autoflush  = False , expire_on_commit = False)
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+asyncio.run(create_tables())
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield  db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from routers.Auth import get_current_user
+
+app.dependency_overrides[get_current_user] = lambda: {"username": "bulk", "id": 7, "user_role": "user"}
+client = TestClient(app)
+
+
+def todo(todo_id, title="bulk title"):
+    return {"id": todo_id, "title": title, "description": "bulk description", "priority": 1}
+
+
+def test_bulk_create_reports_invalid_items():
+    response = client.post("/todos/bulk", json=[todo(7001), todo(7002, title="x"), "not a todo", todo(7003)])
+    assert response.status_code == 201
+    body = response.json()
+    assert body["ids"] == [7001, 7003]
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+
+
+def test_bulk_create_reports_taken_ids_per_item():
+    client.post("/todos/bulk", json=[todo(7051)])
+    response = client.post("/todos/bulk", json=[todo(7052), todo(7051), todo(7053), todo(7052)])
+    assert response.status_code == 201
+    body = response.json()
+    assert body["ids"] == [7052, 7053]
+    assert [error["index"] for error in body["errors"]] == [1, 3]
+    assert body["errors"][0]["errors"] == [{"type": "conflict", "msg": "Todo id already exists"}]
+
+
+def test_bulk_create_uses_few_statements():
+    statements = []
+    listener = lambda *params: statements.append(params[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/todos/bulk", json=[todo(todo_id) for todo_id in range(8000, 10500)])
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 201
+    assert len(response.json()["ids"]) == 2500
+    assert len([sql for sql in statements if sql.startswith("INSERT")]) <= 3
+
+
+def test_bulk_update_and_complete():
+    client.post("/todos/bulk", json=[todo(7101), todo(7102)])
+    response = client.put("/todos/bulk", json=[todo(7101, title="renamed"), todo(7199)])
+    assert response.json() == {"ids": [7101], "errors": [{"index": 1, "errors": [{"type": "not_found",
+                                                                                   "msg": "Todo not found"}]}]}
+    assert client.get("/todo/7101").json()["title"] == "renamed"
+
+    response = client.post("/todos/bulk/complete", json=[7102, 7199])
+    assert response.json()["ids"] == [7102]
+    assert response.json()["errors"][0]["index"] == 1
+    assert client.get("/todo/7102").json()["complete"] is True
+
+
+def test_listing_reflects_writes():
+    client.post("/todos/bulk", json=[todo(7201)])
+    listed = lambda: [item["id"] for item in client.get("/?limit=500").json()["items"]]
+    assert 7201 in listed()
+    assert 7201 in listed()
+    client.delete("/todo/7201")
+    assert 7201 not in listed()
+
+
+# Pagination runs as a separate owner so the todos written by the tests above stay out of the pages
+@contextmanager
+def as_user(user_id):
+    app.dependency_overrides[get_current_user] = lambda: {"username": "pages", "id": user_id, "user_role": "user"}
+    try:
+        yield
+    finally:
+        app.dependency_overrides[get_current_user] = lambda: {"username": "bulk", "id": 7, "user_role": "user"}
+
+
+def listed_ids(query):
+    body = client.get(f"/?{query}").json()
+    return [item["id"] for item in body["items"]], body["next_cursor"]
+
+
+def test_cursor_pages_through_all_todos():
+    with as_user(8):
+        client.post("/todos/bulk", json=[todo(todo_id) for todo_id in range(11001, 11006)])
+        ids, cursor = listed_ids("limit=2")
+        assert ids == [11001, 11002]
+        ids, cursor = listed_ids(f"limit=2&cursor={cursor}")
+        assert ids == [11003, 11004]
+        # The last page has no cursor
+        ids, cursor = listed_ids(f"limit=2&cursor={cursor}")
+        assert (ids, cursor) == ([11005], None)
+        assert listed_ids("limit=5") == ([11001, 11002, 11003, 11004, 11005], None)
+
+
+def test_filters_apply_across_pages():
+    with as_user(9):
+        client.post("/todos/bulk", json=[{**todo(todo_id), "priority": todo_id % 2} for todo_id in range(12001, 12007)])
+        client.post("/todos/bulk/complete", json=[12002, 12003, 12005])
+        ids, cursor = listed_ids("complete=true&limit=2")
+        assert ids == [12002, 12003]
+        assert listed_ids(f"complete=true&limit=2&cursor={cursor}") == ([12005], None)
+        assert listed_ids("priority=true") == ([12001, 12003, 12005], None)
+        assert listed_ids("complete=false&priority=false") == ([12004, 12006], None)
+
+
+def test_malformed_cursor_is_rejected():
+    for cursor in ["not-a-cursor", "e30", "eyJpZCI6ICJ4In0"]:
+        response = client.get(f"/?cursor={cursor}")
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_admin_deletes_todo_without_owner():
+    async def add_unowned_todo():
+        async with TestingSessionLocal() as db:
+            db.add(Todos(id=13001, title="no owner", description="created through main.py", priority=1))
+            await db.commit()
+
+    async def todo_exists():
+        async with TestingSessionLocal() as db:
+            return await db.get(Todos, 13001) is not None
+
+    asyncio.run(add_unowned_todo())
+    app.dependency_overrides[get_current_user] = lambda: {"username": "admin", "id": 1, "user_role": "admin"}
+    try:
+        assert client.delete("/auth/todo/13001").status_code == 204
+        assert client.delete("/auth/todo/13001").status_code == 404
+    finally:
+        app.dependency_overrides[get_current_user] = lambda: {"username": "bulk", "id": 7, "user_role": "user"}
+    assert not asyncio.run(todo_exists())